@@ -9,21 +9,59 @@ import win32gui
 import win32api
 import win32process
 import win32con
-import win32ui
 import win32gui_struct
 import ctypes
-import psutil
+from ctypes import wintypes
 import threading
+import queue
 import time
 import signal
 import sys
 import json
+import copy
 import os
 import winreg
 import subprocess
 import logging
+import math
+import traceback
+import functools
+import statistics
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from PIL import Image, ImageDraw  # For tray icon
+
+try:
+    import orjson  # Optional, much faster JSON encoding/decoding
+except ImportError:
+    orjson = None
+
+try:
+    import pystray  # Optional, for the system tray icon
+except ImportError:
+    pystray = None
+
+# Parsed data files keyed by path, stored with the mtime they were read at
+_CACHE = {}
+
+def _json_loads(buf):
+    """Parse JSON bytes, using orjson when available."""
+    if orjson:
+        return orjson.loads(buf)
+    return json.loads(buf)
+
+def _json_dumps(obj):
+    """Serialize an object to indented JSON bytes, using orjson when available."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+def _json_line(obj):
+    """Serialize an object to one compact line of JSON bytes, newline included."""
+    if orjson:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8') + b'\n'
 
 def setup_logging():
     """Setup logging with a new file for each run."""
@@ -48,34 +86,278 @@ def setup_logging():
     logging.info("Starting Greenhouse Window Manager")
     return log_file
 
-def wndproc(hwnd, msg, wparam, lparam):
-    """Window procedure for overlay windows."""
-    logging.debug(f"wndproc called for hwnd: {hwnd}, msg: {msg}")
-    if msg == win32con.WM_DESTROY:
-        return 0
-    elif msg == win32con.WM_PAINT:
-        logging.debug(f"WM_PAINT received for hwnd: {hwnd}")
-        ps = win32gui.BeginPaint(hwnd)
-        try:
-            rect = win32gui.GetClientRect(hwnd)
-            left, top, right, bottom = rect
-            width = right - left
-            height = bottom - top
+class SHFILEINFOW(ctypes.Structure):
+    """File information returned by SHGetFileInfoW."""
+    _fields_ = [
+        ('hIcon', wintypes.HICON),
+        ('iIcon', ctypes.c_int),
+        ('dwAttributes', wintypes.DWORD),
+        ('szDisplayName', wintypes.WCHAR * 260),
+        ('szTypeName', wintypes.WCHAR * 80)
+    ]
 
-            # Create a solid green brush for testing
-            brush = win32gui.CreateSolidBrush(win32api.RGB(0, 255, 0))
-            # Fill the entire window with green (for testing)
-            win32gui.FillRect(ps[0], rect, brush)
-            win32gui.DeleteObject(brush)
+class ICONINFO(ctypes.Structure):
+    """Icon bitmaps returned by GetIconInfo."""
+    _fields_ = [
+        ('fIcon', wintypes.BOOL),
+        ('xHotspot', wintypes.DWORD),
+        ('yHotspot', wintypes.DWORD),
+        ('hbmMask', wintypes.HBITMAP),
+        ('hbmColor', wintypes.HBITMAP)
+    ]
 
-        except Exception as e:
-            logging.error(f"Error in WM_PAINT: {e}")
-        finally:
-            win32gui.EndPaint(hwnd, ps[1])
-        return 0
-    elif msg == win32con.WM_NCHITTEST:
-        return win32con.HTTRANSPARENT
-    return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+class BITMAP(ctypes.Structure):
+    """Bitmap description returned by GetObjectW."""
+    _fields_ = [
+        ('bmType', wintypes.LONG),
+        ('bmWidth', wintypes.LONG),
+        ('bmHeight', wintypes.LONG),
+        ('bmWidthBytes', wintypes.LONG),
+        ('bmPlanes', wintypes.WORD),
+        ('bmBitsPixel', wintypes.WORD),
+        ('bmBits', wintypes.LPVOID)
+    ]
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    """Pixel format requested from GetDIBits."""
+    _fields_ = [
+        ('biSize', wintypes.DWORD),
+        ('biWidth', wintypes.LONG),
+        ('biHeight', wintypes.LONG),
+        ('biPlanes', wintypes.WORD),
+        ('biBitCount', wintypes.WORD),
+        ('biCompression', wintypes.DWORD),
+        ('biSizeImage', wintypes.DWORD),
+        ('biXPelsPerMeter', wintypes.LONG),
+        ('biYPelsPerMeter', wintypes.LONG),
+        ('biClrUsed', wintypes.DWORD),
+        ('biClrImportant', wintypes.DWORD)
+    ]
+
+WM_DPICHANGED = 0x02E0
+DBT_DEVNODES_CHANGED = 0x0007  # WM_DEVICECHANGE: a device was added or removed
+SHGFI_ICON = 0x100
+SHGFI_LARGEICON = 0x0
+BI_RGB = 0
+DIB_RGB_COLORS = 0
+
+ctypes.windll.shell32.SHGetFileInfoW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD,
+                                                 ctypes.POINTER(SHFILEINFOW), wintypes.UINT, wintypes.UINT]
+ctypes.windll.shell32.SHGetFileInfoW.restype = ctypes.c_void_p
+ctypes.windll.user32.GetIconInfo.argtypes = [wintypes.HICON, ctypes.POINTER(ICONINFO)]
+ctypes.windll.user32.DestroyIcon.argtypes = [wintypes.HICON]
+ctypes.windll.user32.GetDC.restype = wintypes.HDC
+ctypes.windll.user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+ctypes.windll.gdi32.GetObjectW.argtypes = [wintypes.HGDIOBJ, ctypes.c_int, wintypes.LPVOID]
+ctypes.windll.gdi32.GetDIBits.argtypes = [wintypes.HDC, wintypes.HBITMAP, wintypes.UINT, wintypes.UINT,
+                                          wintypes.LPVOID, ctypes.POINTER(BITMAPINFOHEADER), wintypes.UINT]
+ctypes.windll.gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+
+def read_bitmap_bits(hdc, hbitmap, width, height):
+    """Read a bitmap as top-down 32-bit BGRA pixels."""
+    header = BITMAPINFOHEADER(
+        biSize=ctypes.sizeof(BITMAPINFOHEADER),
+        biWidth=width,
+        biHeight=-height,  # Negative height gives top-down rows
+        biPlanes=1,
+        biBitCount=32,
+        biCompression=BI_RGB
+    )
+    bits = ctypes.create_string_buffer(width * height * 4)
+    if not ctypes.windll.gdi32.GetDIBits(hdc, hbitmap, 0, height, bits,
+                                         ctypes.byref(header), DIB_RGB_COLORS):
+        raise ctypes.WinError()
+    return bits
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+ctypes.windll.kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+ctypes.windll.kernel32.OpenProcess.restype = wintypes.HANDLE
+ctypes.windll.kernel32.QueryFullProcessImageNameW.argtypes = [wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR,
+                                                              ctypes.POINTER(wintypes.DWORD)]
+ctypes.windll.kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+def exe_for_pid(pid):
+    """Get the full executable path of a process, or None if it can't be queried."""
+    handle = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        buf = ctypes.create_unicode_buffer(1024)
+        size = wintypes.DWORD(len(buf))
+        if not ctypes.windll.kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+            return None
+        return buf.value
+    finally:
+        ctypes.windll.kernel32.CloseHandle(handle)
+
+ctypes.windll.psapi.EnumProcesses.argtypes = [ctypes.POINTER(wintypes.DWORD), wintypes.DWORD,
+                                              ctypes.POINTER(wintypes.DWORD)]
+
+def running_executables():
+    """Get the lowercased executable paths of all running processes we can query."""
+    count = 1024
+    while True:
+        pids = (wintypes.DWORD * count)()
+        needed = wintypes.DWORD()
+        if not ctypes.windll.psapi.EnumProcesses(pids, ctypes.sizeof(pids), ctypes.byref(needed)):
+            raise ctypes.WinError()
+        # A full buffer may mean it was too small
+        if needed.value < ctypes.sizeof(pids):
+            break
+        count *= 2
+    
+    running = set()
+    for pid in pids[:needed.value // ctypes.sizeof(wintypes.DWORD)]:
+        exe_path = exe_for_pid(pid)
+        if exe_path:
+            running.add(exe_path.lower())
+    return running
+
+EnumWindowsProc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+
+ctypes.windll.user32.EnumWindows.argtypes = [EnumWindowsProc, wintypes.LPARAM]
+ctypes.windll.user32.GetWindowLongW.argtypes = [wintypes.HWND, ctypes.c_int]
+ctypes.windll.user32.GetWindowTextLengthW.argtypes = [wintypes.HWND]
+ctypes.windll.user32.GetWindow.argtypes = [wintypes.HWND, wintypes.UINT]
+ctypes.windll.user32.GetWindow.restype = wintypes.HWND
+
+EVENT_SYSTEM_MINIMIZESTART = 0x0016
+EVENT_SYSTEM_MINIMIZEEND = 0x0017
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+GA_ROOT = 2
+
+WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG,
+                                  wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+ctypes.windll.user32.SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc,
+                                                 wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+ctypes.windll.user32.SetWinEventHook.restype = wintypes.HANDLE
+ctypes.windll.user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+ctypes.windll.user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+ctypes.windll.user32.GetAncestor.restype = wintypes.HWND
+
+def is_trackable_window(hwnd, _get_long=ctypes.windll.user32.GetWindowLongW,
+                        _get_window=ctypes.windll.user32.GetWindow,
+                        _get_title_length=ctypes.windll.user32.GetWindowTextLengthW):
+    """Check for a visible, non-minimized application window with a title.
+    
+    Owned windows (dialogs) and tool windows (palettes) belong to another
+    window and are not tracked. The cheapest checks come first.
+    """
+    style = _get_long(hwnd, win32con.GWL_STYLE)
+    if not style & win32con.WS_VISIBLE or style & win32con.WS_MINIMIZE:
+        return False
+    if _get_window(hwnd, win32con.GW_OWNER):
+        return False
+    if _get_long(hwnd, win32con.GWL_EXSTYLE) & win32con.WS_EX_TOOLWINDOW:
+        return False
+    return bool(_get_title_length(hwnd))
+
+def trackable_windows(predicate=is_trackable_window):
+    """List the top-level windows accepted by predicate.
+    
+    The filter runs inside a raw ctypes callback so rejected windows cost only
+    plain user32 calls; titles, classes and pids are fetched afterwards, for
+    the survivors only.
+    
+    Args:
+        predicate: Function taking a window handle, True to keep the window
+    """
+    hwnds = []
+    
+    @EnumWindowsProc
+    def callback(hwnd, lparam):
+        if predicate(hwnd):
+            hwnds.append(hwnd)
+        return True
+    
+    ctypes.windll.user32.EnumWindows(callback, 0)
+    return hwnds
+
+def init_icon_worker():
+    """Prepare an icon worker thread; SHGetFileInfoW requires COM."""
+    ctypes.windll.ole32.CoInitialize(None)
+
+@functools.lru_cache(maxsize=256)
+def extract_icon_bits(exe_path):
+    """Extract an executable's icon as raw 32-bit BGRA pixels.
+    
+    Runs on an icon worker thread, so it must not touch Tk. Results are cached
+    per executable, so an icon that was evicted from WindowManager.icon_cache,
+    or requested again after a cancelled request, is not extracted twice.
+    
+    Returns:
+        tuple: (bits buffer, width, height), or None if the executable has no icon
+    """
+    user32 = ctypes.windll.user32
+    gdi32 = ctypes.windll.gdi32
+    
+    # Get the shell's large icon for the executable
+    file_info = SHFILEINFOW()
+    if not ctypes.windll.shell32.SHGetFileInfoW(exe_path, 0, ctypes.byref(file_info),
+                                                ctypes.sizeof(file_info),
+                                                SHGFI_ICON | SHGFI_LARGEICON):
+        return None
+    if not file_info.hIcon:
+        return None
+    
+    icon_info = ICONINFO()
+    screen_dc = None
+    try:
+        if not user32.GetIconInfo(file_info.hIcon, ctypes.byref(icon_info)):
+            return None
+        if not icon_info.hbmColor:
+            return None  # Monochrome icon
+        
+        bitmap = BITMAP()
+        gdi32.GetObjectW(icon_info.hbmColor, ctypes.sizeof(bitmap), ctypes.byref(bitmap))
+        width, height = bitmap.bmWidth, bitmap.bmHeight
+        
+        # Read the color bitmap straight into a BGRA buffer, alpha included
+        screen_dc = user32.GetDC(None)
+        bits = read_bitmap_bits(screen_dc, icon_info.hbmColor, width, height)
+        
+        # Icons without an alpha channel take their transparency from the mask
+        alpha = memoryview(bits).cast('B')[3::4]
+        if not any(alpha):
+            mask = memoryview(read_bitmap_bits(screen_dc, icon_info.hbmMask, width, height)).cast('B')
+            alpha[:] = bytes(0 if masked else 255 for masked in mask[0::4])
+        
+        return bits, width, height
+    finally:
+        # Clean up
+        if screen_dc:
+            user32.ReleaseDC(None, screen_dc)
+        if icon_info.hbmColor:
+            gdi32.DeleteObject(icon_info.hbmColor)
+        if icon_info.hbmMask:
+            gdi32.DeleteObject(icon_info.hbmMask)
+        user32.DestroyIcon(file_info.hIcon)
+
+_overlay_brush = None
+
+def overlay_brush():
+    """Return the green brush shared by every overlay window class."""
+    global _overlay_brush
+    if _overlay_brush is None:
+        _overlay_brush = win32gui.CreateSolidBrush(win32api.RGB(0, 255, 0))
+    return _overlay_brush
+
+# Window procedure for overlay windows. pywin32 still looks each message up
+# in this map under the GIL, but with no entry no Python handler runs and
+# the message goes to DefWindowProc. Overlays are filled by the class
+# background brush, so even WM_PAINT needs no handler, and they are
+# WS_EX_TRANSPARENT, so clicks fall through without a WM_NCHITTEST handler.
+wndproc = {}
 
 def create_overlay_window():
     """Create a transparent overlay window."""
@@ -90,7 +372,7 @@ def create_overlay_window():
         wndClass.hInstance = hInstance
         wndClass.hCursor = win32gui.LoadCursor(None, win32con.IDC_ARROW)
         wndClass.style = win32con.CS_HREDRAW | win32con.CS_VREDRAW
-        wndClass.hbrBackground = None  # Let WM_PAINT handle all drawing
+        wndClass.hbrBackground = overlay_brush()
         
         try:
             win32gui.RegisterClass(wndClass)
@@ -100,7 +382,7 @@ def create_overlay_window():
         
         # Create window with modified styles
         hwnd = win32gui.CreateWindowEx(
-            win32con.WS_EX_LAYERED | win32con.WS_EX_TOPMOST | win32con.WS_EX_TOOLWINDOW,
+            win32con.WS_EX_LAYERED | win32con.WS_EX_TOPMOST | win32con.WS_EX_TOOLWINDOW | win32con.WS_EX_TRANSPARENT,
             class_name,
             None,
             win32con.WS_POPUP | win32con.WS_VISIBLE,
@@ -128,15 +410,43 @@ class Settings:
     
     def __init__(self):
         self.data_file = os.path.expanduser("~/.greenhouse/saved_positions.json")
+        # Window changes since the last full save, one JSON record per line
+        self.log_file = os.path.splitext(self.data_file)[0] + ".ndjson"
         os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+        self.log_records = 0
+        self._pending_records = []  # Deferred change records, written by flush()
         self.data = self.load_data()
     
+    def _file_stamps(self):
+        """Get the modification times of the data file and change log."""
+        stamps = []
+        for path in (self.data_file, self.log_file):
+            try:
+                stamps.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                stamps.append(None)
+        return tuple(stamps)
+    
     def load_data(self):
-        """Load all data from file."""
+        """Load all data from file, then replay the change log on top of it."""
+        data = self._load_snapshot()
+        self.log_records = self._replay_log(data)
+        self._stamps = self._file_stamps()
+        return data
+    
+    def _load_snapshot(self):
+        """Load the full data file, reusing the last parse if the file is unchanged."""
         try:
-            with open(self.data_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            mtime = os.stat(self.data_file).st_mtime_ns
+            cached = _CACHE.get(self.data_file)
+            if cached and cached[0] == mtime:
+                return copy.deepcopy(cached[1])
+            
+            with open(self.data_file, 'rb') as f:
+                data = _json_loads(f.read())
+            _CACHE[self.data_file] = (mtime, copy.deepcopy(data))
+            return data
+        except (FileNotFoundError, ValueError):  # ValueError covers both JSON decode errors
             return {
                 "settings": {
                     "start_with_windows": False
@@ -144,23 +454,120 @@ class Settings:
                 "windows": {}
             }
     
-    def save_data(self):
-        """Save all data to file."""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.data, f, indent=2)
+    def _replay_log(self, data):
+        """Apply the change log to freshly loaded data.
+        
+        Returns:
+            int: Number of records in the log
+        """
+        try:
+            with open(self.log_file, 'rb') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return 0
+        
+        windows = data.setdefault("windows", {})
+        for line in lines:
+            try:
+                record = _json_loads(line)
+            except ValueError:
+                # A crash mid-append leaves a torn last line; everything before it is intact
+                logging.warning(f"Skipping unreadable record in {self.log_file}")
+                continue
+            if record["action"] == "upsert":
+                windows[record["hwnd_key"]] = {"info": record["info"], "position": record["position"]}
+            else:
+                windows.pop(record["hwnd_key"], None)
+        return len(lines)
     
-    def load_window_positions(self):
-        """Load saved window positions."""
-        return self.data.get("windows", {})
+    def _append_log(self, records):
+        """Append change records to the log, compacting it once it outgrows the data file.
+        
+        Deferred records are written first.
+        
+        Args:
+            records: List of upsert/delete records
+        """
+        records = self._pending_records + records
+        self._pending_records = []
+        if not records:
+            return
+        with open(self.log_file, 'ab') as f:
+            f.write(b''.join(_json_line(record) for record in records))
+        self.log_records += len(records)
+        if self.log_records > 2 * max(len(self.data.get("windows", {})), 1):
+            self.save_data()
+        else:
+            self._stamps = self._file_stamps()
     
-    def save_window_positions(self, positions):
-        """Save window positions to file.
+    def append_mutation(self, op, hwnd, data=None, defer=False):
+        """Record a change to one saved window as a single change log line.
         
         Args:
-            positions: Dictionary of window information and positions
+            op: "set" to save data for the window, "del" to forget it
+            hwnd: Window handle
+            data: Dictionary with the window's "info" and "position" (for "set")
+            defer: Only update memory now and leave the disk write to flush()
+            
+        Returns:
+            bool: Whether the saved data changed
+        """
+        key = str(hwnd)
+        windows = self.data.setdefault("windows", {})
+        if op == "del":
+            if windows.pop(key, None) is None:
+                return False
+            record = {"hwnd_key": key, "action": "delete"}
+        else:
+            if windows.get(key) == data:
+                return False
+            windows[key] = data
+            record = {"hwnd_key": key, "action": "upsert",
+                      "info": data["info"], "position": data["position"]}
+        if defer:
+            self._pending_records.append(record)
+        else:
+            self._append_log([record])
+        return True
+    
+    def flush(self):
+        """Write any deferred window changes to disk."""
+        self._append_log([])
+    
+    def compact(self):
+        """Fold the change log and any deferred changes into the data file."""
+        if self.log_records or self._pending_records:
+            self.save_data()
+    
+    def save_data(self):
+        """Save all data to file and clear the change log it now contains."""
+        # Write to a temporary file first so a crash never leaves a truncated file
+        tmp_file = self.data_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(_json_dumps(self.data))
+        os.replace(tmp_file, self.data_file)
+        _CACHE[self.data_file] = (os.stat(self.data_file).st_mtime_ns, copy.deepcopy(self.data))
+        
+        # Replaying the log over the new file would be harmless, so a crash here loses nothing
+        try:
+            os.remove(self.log_file)
+        except FileNotFoundError:
+            pass
+        self.log_records = 0
+        self._pending_records = []  # The new file already contains them
+        self._stamps = self._file_stamps()
+    
+    def load_window_positions(self):
+        """Load saved window positions.
+        
+        Served from memory; the files are only re-read if something else changed
+        them. Returns a shallow copy, safe to iterate while positions change;
+        changes are written through append_mutation().
         """
-        self.data["windows"] = positions
-        self.save_data()
+        if not self._pending_records and self._file_stamps() != self._stamps:
+            logging.info("Data file changed on disk, reloading")
+            self.data = self.load_data()
+        return dict(self.data.get("windows", {}))
     
     def set_startup(self, enable):
         """Configure application to run at startup."""
@@ -193,15 +600,19 @@ class Settings:
         return self.data["settings"]
 
 class CustomListbox(tk.Frame):
-    """Custom listbox with icons and two-line items."""
+    """Custom listbox with icons and two-line items.
+    
+    Items are kept as plain dicts; only the rows intersecting the viewport
+    have widgets, drawn from a small pool that is recycled while scrolling.
+    """
+    
+    ROW_HEIGHT = 40  # Fixed row height in pixels (32px icon plus padding)
     
     def __init__(self, master, **kwargs):
         super().__init__(master)
-        self.canvas = tk.Canvas(self, bg='white')
-        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.canvas.yview)
-        
-        # Frame to contain the items
-        self.items_frame = ttk.Frame(self.canvas, style='White.TFrame')
+        self.canvas = tk.Canvas(self, bg='white', highlightthickness=0,
+                                yscrollincrement=self.ROW_HEIGHT)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scroll)
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
         
         # Layout
@@ -210,64 +621,56 @@ class CustomListbox(tk.Frame):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
         
-        # Create canvas window
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.items_frame, anchor="nw")
+        # Invisible rectangle sized to the virtual height of the list
+        self._extent = self.canvas.create_rectangle(0, 0, 0, 0, outline='', width=0)
         
         # Bind events
         self.canvas.bind('<Configure>', self._on_canvas_configure)
-        self.items_frame.bind('<Configure>', self._on_frame_configure)
+        self.canvas.bind('<MouseWheel>', self._on_mousewheel)
         self.selected_indices = set()
         self.items = []
+        self.items_by_hwnd = {}  # hwnd -> first item showing that window
         self.on_selection_change = None  # Callback for selection changes
+        self._suspended = False  # Set while a batch of changes is in progress
+        self._pending_repaint = False
+        
+        # Pool of row widgets, enough to cover the visible area
+        self._row_pool = []
+        self._grow_pool(int(self.canvas.cget('height')))
     
-    def _on_canvas_configure(self, event):
-        self.canvas.itemconfig(self.canvas_window, width=event.width)
-    
-    def _on_frame_configure(self, event):
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-    
-    def delete(self, start, end=None):
-        """Clear items from the listbox."""
-        for widget in self.items_frame.winfo_children():
-            widget.destroy()
-        self.items.clear()
-        self.selected_indices.clear()
-    
-    def insert(self, index, icon, process_name, title, hwnd):
-        """Insert a new item with icon and two lines of text."""
+    def _create_row(self):
+        """Create one reusable row of widgets."""
         # Container frame for the entire item
-        container_frame = ttk.Frame(self.items_frame, style='White.TFrame')
-        container_frame.pack(fill=tk.X, expand=True)
+        container_frame = ttk.Frame(self.canvas, style='Row.TFrame')
         
         # Main item frame that will be highlighted
-        item_frame = ttk.Frame(container_frame, style='White.TFrame')
-        item_frame.pack(fill=tk.X, expand=True, padx=2, pady=1)
+        item_frame = ttk.Frame(container_frame, style='Row.TFrame')
+        item_frame.pack(fill=tk.BOTH, expand=True, padx=2, pady=1)
         
         # Create icon label with fixed width for alignment
-        icon_frame = ttk.Frame(item_frame, width=32, height=32, style='White.TFrame')
+        icon_frame = ttk.Frame(item_frame, width=32, height=32, style='Row.TFrame')
         icon_frame.pack(side=tk.LEFT, padx=(5, 10))
         icon_frame.pack_propagate(False)  # Maintain fixed width
         
         icon_label = tk.Label(icon_frame, bg='white')  # Use tk.Label instead of ttk.Label for better image support
         icon_label.pack(expand=True, fill=tk.BOTH)
-        if icon:
-            icon_label.configure(image=icon)
-            icon_label.image = icon  # Keep a reference
         
         # Text frame for process name and title
-        text_frame = ttk.Frame(item_frame, style='White.TFrame')
+        text_frame = ttk.Frame(item_frame, style='Row.TFrame')
         text_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
-        # Process name (capitalized) and title
-        process_label = ttk.Label(text_frame, text=process_name.capitalize(), 
-                                font=('TkDefaultFont', 10, 'bold'),
-                                style='White.TLabel')
-        process_label.pack(anchor=tk.W, pady=(0, 0))  # Removed top padding
-        title_label = ttk.Label(text_frame, text=title, style='White.TLabel')
+        process_label = ttk.Label(text_frame, font=('TkDefaultFont', 10, 'bold'),
+                                  style='Row.TLabel')
+        process_label.pack(anchor=tk.W, pady=(0, 0))
+        title_label = ttk.Label(text_frame, style='Row.TLabel')
         title_label.pack(anchor=tk.W)
         
-        # Store item info
-        item_info = {
+        window_id = self.canvas.create_window(0, 0, window=container_frame, anchor="nw",
+                                              width=max(self.canvas.winfo_width(), 1),
+                                              height=self.ROW_HEIGHT, state='hidden')
+        
+        row = {
+            'window_id': window_id,
             'container': container_frame,
             'frame': item_frame,
             'icon_frame': icon_frame,
@@ -275,16 +678,206 @@ class CustomListbox(tk.Frame):
             'process_label': process_label,
             'title_label': title_label,
             'icon_label': icon_label,
+            # ttk widgets colored by the row state; states don't propagate to children
+            'styled': (container_frame, item_frame, icon_frame, text_frame, process_label, title_label),
+            'item': None,      # Item currently shown in this row
+            'y': None,         # Canvas y coordinate of the row
+            'content': None    # Last values pushed to the widgets
+        }
+        
+        # Bind events for all widgets
+        for widget in [container_frame, item_frame, icon_frame, icon_label,
+                       process_label, title_label, text_frame]:
+            widget.bind('<Button-1>', lambda e, r=row: self._on_row_click(r))
+            widget.bind('<MouseWheel>', self._on_mousewheel)
+        return row
+    
+    def _grow_pool(self, height):
+        """Make sure the pool has enough rows to cover the given height."""
+        needed = math.ceil(height / self.ROW_HEIGHT) + 2
+        while len(self._row_pool) < needed:
+            self._row_pool.append(self._create_row())
+    
+    def _on_canvas_configure(self, event):
+        self._grow_pool(event.height)
+        for row in self._row_pool:
+            self.canvas.itemconfigure(row['window_id'], width=event.width)
+        self._repaint()
+    
+    def _on_scroll(self, *args):
+        self.canvas.yview(*args)
+        self._repaint()
+    
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-event.delta / 120), 'units')
+        self._repaint()
+    
+    def _on_row_click(self, row):
+        if row['item'] is not None:
+            self._on_item_click(row['item'])
+    
+    def _schedule_repaint(self):
+        """Repaint once the current batch of changes is done."""
+        if not self._pending_repaint:
+            self._pending_repaint = True
+            if not self._suspended:
+                self.after_idle(self._repaint)
+    
+    def begin_batch(self):
+        """Suspend repaints until end_batch() is called."""
+        self._suspended = True
+    
+    def end_batch(self):
+        """Resume repaints and apply all pending changes in a single pass."""
+        self._suspended = False
+        if self._pending_repaint:
+            self._repaint()
+            self.update_idletasks()
+    
+    @contextmanager
+    def batch(self):
+        """Context manager wrapping begin_batch()/end_batch()."""
+        self.begin_batch()
+        try:
+            yield self
+        finally:
+            self.end_batch()
+    
+    def _repaint(self):
+        """Map the pooled rows onto the items in the visible part of the list."""
+        self._pending_repaint = False
+        total = len(self.items)
+        width = self.canvas.winfo_width()
+        height = total * self.ROW_HEIGHT
+        self.canvas.coords(self._extent, 0, 0, width, height)
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+        
+        first = int(self.canvas.yview()[0] * total)
+        for slot, row in enumerate(self._row_pool):
+            index = first + slot
+            if index < total:
+                self._paint_row(row, self.items[index])
+            elif row['item'] is not None:
+                row['item'] = None
+                self.canvas.itemconfigure(row['window_id'], state='hidden')
+    
+    def _row_content(self, item):
+        """Get the text, icon and widget state an item should be drawn with.
+        
+        The Row.TFrame/Row.TLabel style maps color rows by state: 'alternate'
+        marks an inactive (not running) item and 'selected' a selected one.
+        """
+        process_text = item['process_name'].capitalize()
+        inactive = item.get('inactive', False)
+        selected = item['index'] in self.selected_indices
+        if inactive:
+            process_text = f"{process_text} (NOT RUNNING)"
+            icon_bg = '#E8F5E9'  # Very light green
+        elif selected:
+            icon_bg = '#2E8B57'  # Match the selected row background
+        else:
+            icon_bg = 'white'
+        state = ('alternate' if inactive else '!alternate',
+                 'selected' if selected else '!selected')
+        return process_text, item['title'], item['icon'], state, icon_bg
+    
+    def _paint_row(self, row, item):
+        """Show an item in a pooled row, only touching widgets that changed."""
+        y = item['index'] * self.ROW_HEIGHT
+        if row['y'] != y:
+            self.canvas.coords(row['window_id'], 0, y)
+            row['y'] = y
+        if row['item'] is None:
+            self.canvas.itemconfigure(row['window_id'], state='normal')
+        row['item'] = item
+        
+        content = self._row_content(item)
+        old = row['content']
+        if content == old:
+            return
+        # Each widget call is a Tcl round trip, so only push the values that changed;
+        # selecting a row or a window starting or stopping usually changes just the state
+        process_text, title, icon, state, icon_bg = content
+        if old is None:
+            old = (None,) * len(content)
+        if process_text != old[0]:
+            row['process_label'].configure(text=process_text)
+        if title != old[1]:
+            row['title_label'].configure(text=title)
+        if icon is not old[2] or icon_bg != old[4]:
+            row['icon_label'].configure(image=icon or '', bg=icon_bg)
+        if state != old[3]:
+            for widget in row['styled']:
+                widget.state(state)
+        row['content'] = content
+    
+    def redraw_item(self, item):
+        """Refresh the row showing an item, if it is currently visible."""
+        if self._suspended:
+            self._pending_repaint = True
+            return
+        for row in self._row_pool:
+            if row['item'] is item:
+                self._paint_row(row, item)
+                break
+    
+    def refresh(self, new_rows):
+        """Replace the items, reusing the records of windows that are still listed.
+        
+        Items keep their icon and other state when their hwnd is still present,
+        and the selection follows the hwnds to their new positions.
+        
+        Args:
+            new_rows: List of (icon, process_name, title, hwnd) tuples
+            
+        Returns:
+            list: The new items, in row order
+        """
+        old_items = {item['hwnd']: item for item in self.items}
+        selected_hwnds = {item['hwnd'] for item in self.items
+                          if item['index'] in self.selected_indices}
+        
+        items = []
+        for icon, process_name, title, hwnd in new_rows:
+            item = old_items.pop(hwnd, None)
+            if item is None:
+                item = {'icon': icon, 'hwnd': hwnd}
+            elif icon:
+                item['icon'] = icon
+            item['process_name'] = process_name
+            item['title'] = title
+            item['index'] = len(items)
+            items.append(item)
+        
+        self.items[:] = items
+        self.items_by_hwnd.clear()
+        for item in items:
+            self.items_by_hwnd.setdefault(item['hwnd'], item)
+        self.selected_indices.clear()
+        self.selected_indices.update(item['index'] for item in items
+                                     if item['hwnd'] in selected_hwnds)
+        self._schedule_repaint()
+        return items
+    
+    def insert(self, index, icon, process_name, title, hwnd):
+        """Insert a new item with icon and two lines of text."""
+        item_info = {
+            'icon': icon,
+            'process_name': process_name,
+            'title': title,
             'hwnd': hwnd,
             'index': len(self.items)
         }
         self.items.append(item_info)
-        
-        # Bind events for all widgets
-        for widget in [container_frame, item_frame, icon_frame, icon_label, 
-                      process_label, title_label, text_frame]:
-            if widget:
-                widget.bind('<Button-1>', lambda e, i=item_info: self._on_item_click(i))
+        self.items_by_hwnd.setdefault(hwnd, item_info)
+        self._schedule_repaint()
+    
+    def set_item_hwnd(self, item, hwnd):
+        """Point an item at a different window, e.g. after its program was relaunched."""
+        if self.items_by_hwnd.get(item['hwnd']) is item:
+            del self.items_by_hwnd[item['hwnd']]
+        item['hwnd'] = hwnd
+        self.items_by_hwnd[hwnd] = item
     
     def _on_item_click(self, item_info):
         """Handle item selection."""
@@ -293,21 +886,10 @@ class CustomListbox(tk.Frame):
         if was_selected:
             # Deselect the item
             self.selected_indices.remove(item_info['index'])
-            for widget in [item_info['container'], item_info['frame'], item_info['icon_frame'], item_info['text_frame']]:
-                widget.configure(style='White.TFrame')
-            for widget in [item_info['process_label'], item_info['title_label']]:
-                widget.configure(style='White.TLabel')
-            if item_info['icon_label']:
-                item_info['icon_label'].configure(bg='white')  # Use bg for tk.Label
         else:
             # Select the item
             self.selected_indices.add(item_info['index'])
-            for widget in [item_info['container'], item_info['frame'], item_info['icon_frame'], item_info['text_frame']]:
-                widget.configure(style='Selected.TFrame')
-            for widget in [item_info['process_label'], item_info['title_label']]:
-                widget.configure(style='Selected.TLabel')
-            if item_info['icon_label']:
-                item_info['icon_label'].configure(bg='#2E8B57')  # Match Selected.TFrame background
+        self.redraw_item(item_info)
         
         # Notify about selection change if callback is set
         if self.on_selection_change:
@@ -317,36 +899,74 @@ class CustomListbox(tk.Frame):
         """Return the selected indices."""
         return tuple(sorted(self.selected_indices))
     
-    def _on_focus_out(self, event):
-        """Remove highlights when focus is lost."""
-        if self.highlight_callback:
-            # Only remove window border highlights, keep selection
-            for item in self.items:
-                if item['index'] in self.selected_indices:
-                    self.highlight_callback(item['hwnd'], False)
+    def selected_hwnds(self):
+        """Return the set of window handles of the selected items.
+        
+        Items are stored at their index, so this costs one lookup per
+        selected item, however long the list is.
+        """
+        items = self.items
+        return {items[index]['hwnd'] for index in self.selected_indices}
     
     def update_icon(self, index, icon):
         """Update the icon for an item after it's loaded."""
         if index < len(self.items):
             item = self.items[index]
-            if 'icon_label' in item and item['icon_label']:
-                logging.info(f"Updating icon for item {index}")
-                item['icon_label'].configure(image=icon)
-                item['icon_label'].image = icon  # Keep a reference to prevent garbage collection
-                self.update_idletasks()  # Force a redraw
+            logging.info(f"Updating icon for item {index}")
+            item['icon'] = icon  # Keep a reference to prevent garbage collection
+            self.redraw_item(item)
+
+# One enumeration of the trackable windows, stored as parallel lists plus
+# lookup indexes: (process_path, class_name, title) -> hwnd and
+# (process_path, class_name) -> [hwnd, ...]
+WindowSnapshot = namedtuple('WindowSnapshot', ['hwnds', 'titles', 'class_names',
+                                               'process_names', 'process_paths',
+                                               'by_key', 'by_class'])
+
+# A saved window position, normalized to 96 DPI. Stored as a plain dict on disk.
+WindowPosition = namedtuple('WindowPosition', ['left', 'top', 'width', 'height', 'dpi_scale'],
+                            defaults=[1.0])
+
+def position_from_dict(data):
+    """Build a WindowPosition from its stored dict, or None if the entry is malformed."""
+    try:
+        return WindowPosition(int(data['left']), int(data['top']),
+                              int(data['width']), int(data['height']),
+                              float(data.get('dpi_scale', 1.0)))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        # A hand-edited or older file; skip the entry rather than fail to start
+        logging.warning(f"Skipping malformed saved position: {data!r}")
+        return None
 
 class WindowManager:
     """Handles window management operations using the Windows API."""
     
+    ICON_CACHE_SIZE = 256  # Maximum number of executables with a cached icon
+    ICON_WORKERS = 8  # Icon extraction mostly waits on the shell and disk
+    TITLE_MATCH_RATIO = 0.5  # Share of a saved title a renamed window must still start with
+    
     def __init__(self):
         self.settings = Settings()
         self.saved_window_positions = {}
         self.current_windows = []
         self.previous_monitor_count = self.get_monitor_count()
-        self.monitor_check_active = True
         self.monitor_thread = None
-        self.icon_cache = {}  # Cache for window icons
+        self.monitor_hwnd = None  # Hidden window receiving WM_DISPLAYCHANGE
+        self._dpi_cache = {}  # Monitor handle -> DPI scale factor
+        self._monitor_cache = {}  # Window handle -> (monitor handle, monitor rect)
+        self.icon_cache = OrderedDict()  # Icons keyed by executable path, least recently used first
+        self._icon_executor = ThreadPoolExecutor(max_workers=self.ICON_WORKERS, thread_name_prefix='icon',
+                                                 initializer=init_icon_worker)
+        self._icon_results = queue.Queue()  # (exe_path, future) for finished extractions
+        self._icon_requests = {}  # exe_path -> hwnds waiting for that icon
+        self._icon_futures = {}  # exe_path -> future of the extraction still wanted
+        # Overlays belong to the overlay thread; only its jobs touch these two
         self.overlay_windows = {}  # Store overlay window handles
+        self._overlay_last_rect = {}  # Target hwnd -> (left, top, width, height) its overlay was shown at
+        self._overlay_jobs = queue.Queue()  # (function, args) for the overlay thread to run
+        self.overlay_thread = None
+        self.overlay_worker_hwnd = None  # Message-only window that wakes the overlay thread
+        self.start_overlay_worker()
         
         # Load saved positions
         self.load_saved_positions()
@@ -355,69 +975,113 @@ class WindowManager:
         # Restore windows immediately if auto-starting
         if self.settings.settings["start_with_windows"]:
             logging.info("Auto-start enabled, restoring windows")
-            for hwnd_str, data in self.saved_window_positions.items():
-                try:
-                    hwnd = self.find_matching_window(data["info"])
-                    if hwnd:
-                        self.restore_window_position(hwnd)
-                except Exception as e:
-                    logging.error(f"Failed to restore window {hwnd_str}: {str(e)}")
+            # load_saved_positions() already matched these to running windows
+            self.restore_window_positions(list(self.saved_window_positions))
     
     def get_window_info(self, hwnd):
         """Get detailed window information for persistence."""
         try:
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = psutil.Process(pid)
+            exe_path = exe_for_pid(pid)
+            if not exe_path:
+                return None
             return {
                 "title": win32gui.GetWindowText(hwnd),
-                "process_name": process.name(),
-                "process_path": process.exe(),
+                "process_name": os.path.basename(exe_path),
+                "process_path": exe_path,
                 "class_name": win32gui.GetClassName(hwnd)
             }
         except:
             return None
     
-    def find_matching_window(self, saved_info):
-        """Find a window matching saved information."""
-        def callback(hwnd, matches):
-            if not self.is_window_interesting(hwnd):
-                return
-            
-            current_info = self.get_window_info(hwnd)
-            if not current_info:
-                return
-            
-            # Match based on multiple criteria
-            if (current_info["process_path"] == saved_info["process_path"] and
-                current_info["class_name"] == saved_info["class_name"] and
-                current_info["title"] == saved_info["title"]):
-                matches.append(hwnd)
-        
-        matches = []
-        win32gui.EnumWindows(callback, matches)
-        return matches[0] if matches else None
-    
-    def save_positions_to_disk(self):
-        """Save current window positions to disk."""
-        positions_to_save = {}
-        for hwnd, pos in self.saved_window_positions.items():
-            window_info = self.get_window_info(hwnd)
-            if window_info:
-                positions_to_save[str(hwnd)] = {
-                    "info": window_info,
-                    "position": pos
-                }
-        self.settings.save_window_positions(positions_to_save)
+    def _snapshot_windows(self):
+        """Enumerate all trackable windows in a single pass.
+        
+        Returns:
+            WindowSnapshot: Parallel lists with one entry per window
+        """
+        hwnds = trackable_windows()
+        titles = [win32gui.GetWindowText(hwnd) for hwnd in hwnds]
+        class_names = [win32gui.GetClassName(hwnd) for hwnd in hwnds]
+        pids = [win32process.GetWindowThreadProcessId(hwnd)[1] for hwnd in hwnds]
+        
+        # Look up each process once, however many windows it owns
+        pid_to_proc = {}
+        for pid in set(pids):
+            exe_path = exe_for_pid(pid)
+            pid_to_proc[pid] = (os.path.basename(exe_path), exe_path) if exe_path else (None, None)
+        
+        process_names = [pid_to_proc[pid][0] for pid in pids]
+        process_paths = [pid_to_proc[pid][1] for pid in pids]
+        
+        # Index the windows for constant time matching
+        by_key = {}
+        by_class = {}
+        for i, hwnd in enumerate(hwnds):
+            by_key.setdefault((process_paths[i], class_names[i], titles[i]), hwnd)
+            by_class.setdefault((process_paths[i], class_names[i]), []).append(i)
+        
+        return WindowSnapshot(hwnds, titles, class_names, process_names, process_paths,
+                              by_key, by_class)
+    
+    def find_matching_window(self, saved_info, snapshot=None, claimed=()):
+        """Find a window matching saved information.
+        
+        Args:
+            saved_info: Window information saved by get_window_info()
+            snapshot: WindowSnapshot to search, taken now if not given
+            claimed: Window handles already matched to another saved entry
+        """
+        if snapshot is None:
+            snapshot = self._snapshot_windows()
+        
+        # Match based on multiple criteria
+        title = saved_info["title"]
+        hwnd = snapshot.by_key.get((saved_info["process_path"], saved_info["class_name"], title))
+        if hwnd and hwnd not in claimed:
+            return hwnd
+        
+        # Titles often change (e.g. the open document), so fall back to the unclaimed
+        # window of the same process and class whose title shares the longest prefix,
+        # as long as that prefix covers enough of the saved title to be the same window
+        best, best_length = None, max(math.ceil(len(title) * self.TITLE_MATCH_RATIO), 1) - 1
+        for i in snapshot.by_class.get((saved_info["process_path"], saved_info["class_name"]), []):
+            if snapshot.hwnds[i] in claimed:
+                continue
+            length = len(os.path.commonprefix([snapshot.titles[i], title]))
+            if length > best_length:
+                best, best_length = snapshot.hwnds[i], length
+        return best
     
     def load_saved_positions(self):
         """Load saved positions from disk."""
         saved_data = self.settings.load_window_positions()
         self.saved_window_positions.clear()
         
+        # Windows can only match if their program is running, which is far cheaper
+        # to check than enumerating windows. Entries without a path can't be ruled out.
+        try:
+            running = running_executables()
+        except OSError as e:
+            # Only a shortcut, so match against every saved window instead
+            logging.warning(f"Could not list running processes: {e}")
+        else:
+            saved_data = {hwnd_str: data for hwnd_str, data in saved_data.items()
+                          if not data["info"].get("process_path")
+                          or data["info"]["process_path"].lower() in running}
+        if not saved_data:
+            return
+        
+        # Resolve every saved window against one enumeration
+        snapshot = self._snapshot_windows()
         for hwnd_str, data in saved_data.items():
-            hwnd = self.find_matching_window(data["info"])
+            position = position_from_dict(data.get("position"))
+            if not position:
+                continue
+            # Each window takes at most one saved position
+            hwnd = self.find_matching_window(data["info"], snapshot, self.saved_window_positions)
             if hwnd:
-                self.saved_window_positions[hwnd] = data["position"]
+                self.saved_window_positions[hwnd] = position
     
     def get_monitor_count(self):
         """Get the number of active monitors."""
@@ -425,82 +1089,112 @@ class WindowManager:
 
     def get_process_name(self, hwnd):
         """Get the process name for a window handle."""
-        try:
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = psutil.Process(pid)
-            return process.name()
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return "Unknown"
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        exe_path = exe_for_pid(pid)
+        return os.path.basename(exe_path) if exe_path else "Unknown"
+
+    def _check_monitor_count(self, callback):
+        """Compare the monitor count with the last known one and react to changes."""
+        current_count = self.get_monitor_count()
+        
+        # Only act when monitors are reconnected (1 -> 2)
+        if self.previous_monitor_count == 1 and current_count == 2:
+            logging.info(f"Second monitor connected (Count: {current_count})")
+            if self.saved_window_positions:
+                callback()
+        elif self.previous_monitor_count != current_count:
+            logging.info(f"Monitor count changed: {self.previous_monitor_count} -> {current_count}")
+        
+        self.previous_monitor_count = current_count
 
     def start_monitor_check(self, callback):
-        """Start background thread to check monitor count."""
-        def check_monitors():
-            while self.monitor_check_active:
+        """Start background thread that listens for display changes.
+        
+        The thread owns a hidden top-level window (message-only windows don't
+        receive broadcasts) and sleeps in its message loop until Windows sends
+        WM_DISPLAYCHANGE, or WM_DEVICECHANGE when a device is plugged in or out.
+        The callback runs on this thread, so it must hand off to Tk itself.
+        """
+        def monitor_wndproc(hwnd, msg, wparam, lparam):
+            device_changed = msg == win32con.WM_DEVICECHANGE and wparam == DBT_DEVNODES_CHANGED
+            if msg in (win32con.WM_DISPLAYCHANGE, WM_DPICHANGED) or device_changed:
+                # Monitor handles and DPIs may have changed
+                self._dpi_cache.clear()
+                self.invalidate_monitor_cache()
+            if msg == win32con.WM_DISPLAYCHANGE or device_changed:
                 try:
-                    current_count = self.get_monitor_count()
-                    
-                    # Only act when monitors are reconnected (1 -> 2)
-                    if self.previous_monitor_count == 1 and current_count == 2:
-                        logging.info(f"Second monitor connected (Count: {current_count})")
-                        if self.saved_window_positions:
-                            callback()
-                    elif self.previous_monitor_count != current_count:
-                        logging.info(f"Monitor count changed: {self.previous_monitor_count} -> {current_count}")
-                    
-                    self.previous_monitor_count = current_count
-                    time.sleep(2)
+                    self._check_monitor_count(callback)
                 except Exception as e:
-                    logging.error(f"Error in monitor check thread: {str(e)}")
-                    break
+                    logging.error(f"Error in monitor check: {str(e)}")
+                if msg == win32con.WM_DISPLAYCHANGE:
+                    return 0
+            elif msg == win32con.WM_DESTROY:
+                win32gui.PostQuitMessage(0)
+                return 0
+            # DefWindowProc also grants WM_DEVICECHANGE queries, which need TRUE
+            return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
 
-        self.monitor_thread = threading.Thread(target=check_monitors, daemon=True)
+        def listen_for_monitors():
+            try:
+                hInstance = win32api.GetModuleHandle(None)
+                class_name = f'GreenHouseMonitor_{id(self)}'
+                
+                wndClass = win32gui.WNDCLASS()
+                wndClass.lpfnWndProc = monitor_wndproc
+                wndClass.lpszClassName = class_name
+                wndClass.hInstance = hInstance
+                
+                try:
+                    win32gui.RegisterClass(wndClass)
+                except win32gui.error as e:
+                    if e.winerror != 1410:  # Ignore "Class already exists"
+                        raise
+                
+                self.monitor_hwnd = win32gui.CreateWindowEx(
+                    0, class_name, None, win32con.WS_POPUP,
+                    0, 0, 0, 0, None, None, hInstance, None
+                )
+                
+                win32gui.PumpMessages()
+            except Exception as e:
+                logging.error(f"Error in monitor check thread: {str(e)}")
+            finally:
+                self.monitor_hwnd = None
+
+        self.monitor_thread = threading.Thread(target=listen_for_monitors, daemon=True)
         self.monitor_thread.start()
         logging.info("Monitor check thread started")
 
     def stop_monitor_check(self):
         """Stop the monitor checking thread."""
         logging.info("Stopping monitor check thread")
-        self.monitor_check_active = False
+        if self.monitor_hwnd:
+            # Closing the window ends the thread's message loop
+            win32gui.PostMessage(self.monitor_hwnd, win32con.WM_CLOSE, 0, 0)
         if self.monitor_thread:
             self.monitor_thread.join(timeout=1.0)
             logging.info("Monitor check thread stopped")
 
-    def is_window_interesting(self, hwnd):
-        """Filter for windows we want to track.
+    def enum_windows(self, predicate=is_trackable_window):
+        """Get list of all trackable windows.
         
         Args:
-            hwnd: Window handle to check
-            
-        Returns:
-            bool: True if window should be tracked, False otherwise
-        """
-        # Skip invisible windows
-        if not win32gui.IsWindowVisible(hwnd):
-            return False
-        # Skip minimized windows
-        if win32gui.IsIconic(hwnd):
-            return False
-        # Skip windows without titles
-        title = win32gui.GetWindowText(hwnd)
-        if not title:
-            return False
-        return True
-
-    def enum_windows(self):
-        """Get list of all trackable windows.
+            predicate: Function taking a window handle, True to list the window;
+                titles and processes are only looked up for listed windows
         
         Returns:
             list: List of (hwnd, title, process_name) tuples for all visible windows
         """
         self.current_windows.clear()
         
-        def callback(hwnd, extra):
-            if self.is_window_interesting(hwnd):
-                title = win32gui.GetWindowText(hwnd)
-                process_name = self.get_process_name(hwnd)
-                self.current_windows.append((hwnd, title, process_name))
-        
-        win32gui.EnumWindows(callback, None)
+        # Look up each process once, however many windows it owns
+        pid_to_name = {}
+        for hwnd in trackable_windows(predicate):
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            if pid not in pid_to_name:
+                exe_path = exe_for_pid(pid)
+                pid_to_name[pid] = os.path.basename(exe_path) if exe_path else "Unknown"
+            self.current_windows.append((hwnd, win32gui.GetWindowText(hwnd), pid_to_name[pid]))
         return self.current_windows
 
     def get_monitor_dpi(self, hwnd=None, point=None):
@@ -510,22 +1204,29 @@ class WindowManager:
             hwnd: Window handle (optional)
             point: (x, y) tuple of screen coordinates (optional)
             
-        At least one of hwnd or point must be provided.
+        At least one of hwnd or point must be provided. A window reports its
+        own DPI, which saved positions are normalized with, so only point
+        lookups are cached per monitor, until the display configuration or
+        DPI changes.
         """
         try:
-            if point:
-                monitor = win32api.MonitorFromPoint(point)
-            else:
-                monitor = win32api.MonitorFromWindow(hwnd)
+            if not point:
+                return win32gui.GetDpiForWindow(hwnd) / 96.0  # 96 is the default DPI
+            
+            monitor = int(win32api.MonitorFromPoint(point))
+            if monitor in self._dpi_cache:
+                return self._dpi_cache[monitor]
             
             # Get DPI for the monitor
-            if point:
-                # For a point, we need to use GetDpiForMonitor
-                dpi_x = win32api.GetDpiForMonitor(monitor, 0)[0]  # MDT_EFFECTIVE_DPI = 0
-            else:
-                dpi_x = win32gui.GetDpiForWindow(hwnd)
+            dpi_x, dpi_y = wintypes.UINT(), wintypes.UINT()
+            result = ctypes.windll.shcore.GetDpiForMonitor(wintypes.HMONITOR(monitor), 0,  # MDT_EFFECTIVE_DPI = 0
+                                                           ctypes.byref(dpi_x), ctypes.byref(dpi_y))
+            if result != 0:
+                raise ctypes.WinError(result)
             
-            return dpi_x / 96.0  # 96 is the default DPI
+            scale = dpi_x.value / 96.0  # 96 is the default DPI
+            self._dpi_cache[monitor] = scale
+            return scale
         except:
             return 1.0  # Default scale factor if we can't get DPI
 
@@ -544,13 +1245,13 @@ class WindowManager:
         dpi_scale = self.get_monitor_dpi(hwnd)
         
         # Save normalized coordinates (as if DPI was 96)
-        position_info = {
-            "left": int(left / dpi_scale),
-            "top": int(top / dpi_scale),
-            "width": int(width / dpi_scale),
-            "height": int(height / dpi_scale),
-            "dpi_scale": dpi_scale
-        }
+        position_info = WindowPosition(
+            left=int(left / dpi_scale),
+            top=int(top / dpi_scale),
+            width=int(width / dpi_scale),
+            height=int(height / dpi_scale),
+            dpi_scale=dpi_scale
+        )
         
         # Save to in-memory positions
         self.saved_window_positions[hwnd] = position_info
@@ -558,17 +1259,11 @@ class WindowManager:
         # Get window info
         window_info = self.get_window_info(hwnd)
         if window_info:
-            # Load current saved positions
-            saved_positions = self.settings.load_window_positions()
-            
-            # Update with new window info and position
-            saved_positions[str(hwnd)] = {
+            # Only this entry is written, as one change log record
+            self.settings.append_mutation("set", hwnd, {
                 "info": window_info,
-                "position": position_info
-            }
-            
-            # Save back to disk
-            self.settings.save_window_positions(saved_positions)
+                "position": position_info._asdict()
+            })
             logging.info(f"Saved window position and info for {hwnd} to disk")
 
     def restore_window_position(self, hwnd):
@@ -577,121 +1272,182 @@ class WindowManager:
         Args:
             hwnd: Window handle to restore position for
         """
-        if hwnd in self.saved_window_positions:
-            pos = self.saved_window_positions[hwnd]
-            
-            # Get current and target monitor info
-            current_monitor = win32api.MonitorFromWindow(hwnd)
-            target_monitor = win32api.MonitorFromPoint((int(pos["left"]), int(pos["top"])))
-            
-            if current_monitor != target_monitor:
-                # Moving between monitors - do it in two steps
+        self.restore_window_positions([hwnd])
+
+    def restore_window_positions(self, hwnds):
+        """Restore several windows to their saved positions.
+        
+        All windows are moved in one deferred batch. Windows that land on a
+        monitor with a different DPI then get a second batch, after a single
+        settle delay shared by all of them.
+        
+        Args:
+            hwnds: Window handles to restore positions for
+        """
+        def scaled(pos, dpi):
+            return (int(pos.left * dpi), int(pos.top * dpi),
+                    int(pos.width * dpi), int(pos.height * dpi))
+        
+        moves = []
+        rescale = []  # Windows that need a second move once on their new monitor
+        for hwnd in hwnds:
+            if hwnd not in self.saved_window_positions:
+                continue
+            try:
+                pos = self.saved_window_positions[hwnd]
+                
+                # Get current and target monitor info
+                current_monitor = win32api.MonitorFromWindow(hwnd)
+                target_monitor = win32api.MonitorFromPoint((int(pos.left), int(pos.top)))
                 
                 # Step 1: Move to the target monitor first (using current DPI)
                 current_dpi = self.get_monitor_dpi(hwnd)
-                initial_left = int(pos["left"] * current_dpi)
-                initial_top = int(pos["top"] * current_dpi)
-                initial_width = int(pos["width"] * current_dpi)
-                initial_height = int(pos["height"] * current_dpi)
-                win32gui.MoveWindow(hwnd, initial_left, initial_top, initial_width, initial_height, True)
-                
-                # Let the window settle in its new monitor
-                time.sleep(0.1)
+                rect = scaled(pos, current_dpi)
+                moves.append((hwnd,) + rect)
                 
-                # Step 2: Now adjust for the target monitor's DPI
-                target_dpi = self.get_monitor_dpi(hwnd)  # Get DPI now that window is on target monitor
-                final_left = int(pos["left"] * target_dpi)
-                final_top = int(pos["top"] * target_dpi)
-                final_width = int(pos["width"] * target_dpi)
-                final_height = int(pos["height"] * target_dpi)
-                win32gui.MoveWindow(hwnd, final_left, final_top, final_width, final_height, True)
-            else:
-                # Same monitor - do it in one step
-                target_dpi = self.get_monitor_dpi(hwnd)
-                left = int(pos["left"] * target_dpi)
-                top = int(pos["top"] * target_dpi)
-                width = int(pos["width"] * target_dpi)
-                height = int(pos["height"] * target_dpi)
-                win32gui.MoveWindow(hwnd, left, top, width, height, True)
+                # Step 2 is only needed when moving to a monitor with a different DPI
+                if (current_monitor != target_monitor and
+                        self.get_monitor_dpi(point=rect[:2]) != current_dpi):
+                    rescale.append(hwnd)
+                else:
+                    # Update the saved DPI scale
+                    self.saved_window_positions[hwnd] = pos._replace(dpi_scale=current_dpi)
+            except Exception as e:
+                logging.error(f"Failed to restore window {hwnd}: {str(e)}")
+        
+        self._move_windows(moves)
+        
+        if rescale:
+            # Let the windows settle in their new monitors
+            time.sleep(0.05)
             
-            # Update the saved DPI scale
-            pos["dpi_scale"] = target_dpi
-
-            # Commented out for now - this might be causing the windows to be saved AFTER a monitor is turned off and they move
-            # self.save_positions_to_disk()
+            moves = []
+            for hwnd in rescale:
+                pos = self.saved_window_positions[hwnd]
+                target_dpi = self.get_monitor_dpi(hwnd)  # Get DPI now that window is on target monitor
+                moves.append((hwnd,) + scaled(pos, target_dpi))
+                # Update the saved DPI scale
+                self.saved_window_positions[hwnd] = pos._replace(dpi_scale=target_dpi)
+            self._move_windows(moves)
 
+    def _move_windows(self, moves):
+        """Move and resize windows in a single DeferWindowPos batch.
+        
+        Args:
+            moves: List of (hwnd, left, top, width, height) tuples
+        """
+        if not moves:
+            return
+        
+        flags = win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE
+        try:
+            hdwp = win32gui.BeginDeferWindowPos(len(moves))
+            for hwnd, left, top, width, height in moves:
+                hdwp = win32gui.DeferWindowPos(hdwp, hwnd, 0, left, top, width, height, flags)
+            win32gui.EndDeferWindowPos(hdwp)
+        except win32gui.error as e:
+            # One bad window fails the whole batch, so fall back to moving them one by one
+            logging.warning(f"Batched window move failed, moving individually: {e}")
+            for hwnd, left, top, width, height in moves:
+                try:
+                    win32gui.MoveWindow(hwnd, left, top, width, height, True)
+                except win32gui.error as e:
+                    logging.error(f"Failed to move window {hwnd}: {e}")
+    
     def get_window_icon(self, hwnd):
-        """Get the window's icon as a PhotoImage."""
-        # Check cache first
-        if hwnd in self.icon_cache:
-            return self.icon_cache[hwnd]
-
+        """Get the window's icon as a PhotoImage.
+        
+        Returns the cached icon if there is one. Otherwise the icon is extracted
+        on a worker thread and None is returned; the result is handed out later
+        by drain_icon_results().
+        """
         try:
-            import win32gui
-            import win32ui
-            import win32con
-            from PIL import Image, ImageTk
-            
-            # Try to get the process path and extract icon from exe
+            # Icons belong to the executable, so all windows of a process share one
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = psutil.Process(pid)
-            exe_path = process.exe()
-            
-            # Extract icon from executable
-            large_icons, small_icons = win32gui.ExtractIconEx(exe_path, 0)
-            if not large_icons:
+            exe_path = exe_for_pid(pid)
+            if not exe_path:
                 return None
-                
-            icon_handle = large_icons[0]
-            
-            # Create DC and bitmap
-            screen_dc = win32gui.GetDC(0)
-            hdc = win32ui.CreateDCFromHandle(screen_dc)
-            hdc_mem = hdc.CreateCompatibleDC()
             
-            # Create bitmap and select it into DC
-            hbmp = win32ui.CreateBitmap()
-            hbmp.CreateCompatibleBitmap(hdc, 32, 32)
-            previous_bitmap = hdc_mem.SelectObject(hbmp)
+            # Check cache first
+            if exe_path in self.icon_cache:
+                self.icon_cache.move_to_end(exe_path)
+                return self.icon_cache[exe_path]
             
-            # Set white background
-            hdc_mem.FillSolidRect((0, 0, 32, 32), win32api.RGB(255, 255, 255))
-            
-            # Draw icon
-            win32gui.DrawIconEx(hdc_mem.GetHandleOutput(), 0, 0, icon_handle, 32, 32, 0, None, win32con.DI_NORMAL)
+            # Queue the extraction, once per executable
+            if exe_path in self._icon_requests:
+                self._icon_requests[exe_path].append(hwnd)
+            else:
+                self._icon_requests[exe_path] = [hwnd]
+                future = self._icon_executor.submit(extract_icon_bits, exe_path)
+                self._icon_futures[exe_path] = future
+                future.add_done_callback(lambda f, path=exe_path: self._icon_results.put((path, f)))
+            return None
             
-            # Convert to PIL Image
-            bmpinfo = hbmp.GetInfo()
-            bmpstr = hbmp.GetBitmapBits(True)
-            img = Image.frombuffer(
-                'RGBA',
-                (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-                bmpstr, 'raw', 'BGRA', 0, 1
-            )
+        except Exception as e:
+            logging.error(f"Failed to get icon for window {hwnd}: {str(e)}")
+            return None
+    
+    def icons_pending(self):
+        """Check whether any icon extractions have not been drained yet."""
+        return bool(self._icon_requests)
+    
+    def cancel_icon_requests(self):
+        """Drop icon extractions that haven't started, e.g. because the window list is rebuilt.
+        
+        Extractions already running are kept, since their icon gets cached either way.
+        """
+        for exe_path, future in list(self._icon_futures.items()):
+            if future.cancel():
+                del self._icon_futures[exe_path]
+                del self._icon_requests[exe_path]
+    
+    def stop_icon_workers(self):
+        """Shut down the icon workers without waiting for running extractions."""
+        self._icon_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def drain_icon_results(self):
+        """Turn finished icon extractions into PhotoImages.
+        
+        Must be called from the Tk thread.
+        
+        Returns:
+            list: (hwnd, PhotoImage) tuples for every window that was waiting for an icon
+        """
+        from PIL import Image, ImageTk  # Only needed once icons arrive
+        
+        ready = []
+        while True:
+            try:
+                exe_path, future = self._icon_results.get_nowait()
+            except queue.Empty:
+                break
+            if self._icon_futures.get(exe_path) is not future:
+                continue  # Cancelled, and possibly requested again since
+            del self._icon_futures[exe_path]
+            hwnds = self._icon_requests.pop(exe_path, [])
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Failed to get icon for {exe_path}: {str(e)}")
+                continue
+            if not result:
+                continue
             
-            # Ensure image is in RGBA mode
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
+            # The BGRA -> RGBA swap happens in the raw decoder, straight from the worker's buffer
+            bits, width, height = result
+            img = Image.frombuffer('RGBA', (width, height), bits, 'raw', 'BGRA', 0, 1)
             
-            # Clean up
-            hdc_mem.SelectObject(previous_bitmap)
-            win32gui.DestroyIcon(icon_handle)
-            for icon in large_icons[1:]:
-                win32gui.DestroyIcon(icon)
-            for icon in small_icons:
-                win32gui.DestroyIcon(icon)
-            hdc_mem.DeleteDC()
-            hdc.DeleteDC()
-            win32gui.ReleaseDC(0, screen_dc)
+            # The listbox shows 32x32 icons; the shell's large icon grows with DPI
+            if img.size != (32, 32):
+                img = img.resize((32, 32), Image.Resampling.LANCZOS)
             
             # Convert to PhotoImage
             photo = ImageTk.PhotoImage(img)
-            self.icon_cache[hwnd] = photo
-            return photo
-            
-        except Exception as e:
-            logging.error(f"Failed to get icon for window {hwnd}: {str(e)}")
-            return None
+            self.icon_cache[exe_path] = photo
+            if len(self.icon_cache) > self.ICON_CACHE_SIZE:
+                self.icon_cache.popitem(last=False)
+            ready.extend((hwnd, photo) for hwnd in hwnds)
+        return ready
     
     def create_overlay_window(self, x=0, y=0):
         """Create a transparent overlay window.
@@ -709,7 +1465,7 @@ class WindowManager:
 
             # Create window class
             hInstance = win32api.GetModuleHandle(None)
-            class_name = f'GreenHouseOverlay_{id(self)}_{len(self.overlay_windows)}'
+            class_name = f'GreenHouseOverlay_{id(self)}'  # Registered once, shared by all overlays
             
             # Create window class
             wndClass = win32gui.WNDCLASS()
@@ -718,7 +1474,7 @@ class WindowManager:
             wndClass.hInstance = hInstance
             wndClass.hCursor = win32gui.LoadCursor(None, win32con.IDC_ARROW)
             wndClass.style = win32con.CS_HREDRAW | win32con.CS_VREDRAW | win32con.CS_GLOBALCLASS
-            wndClass.hbrBackground = win32gui.CreateSolidBrush(win32api.RGB(0, 255, 0))
+            wndClass.hbrBackground = overlay_brush()
             
             try:
                 win32gui.RegisterClass(wndClass)
@@ -744,6 +1500,10 @@ class WindowManager:
             # Set the window to be very transparent (32 = ~12.5% opacity)
             win32gui.SetLayeredWindowAttributes(hwnd, 0, 64, win32con.LWA_ALPHA)
             
+            flags = (win32con.SWP_NOSIZE | win32con.SWP_NOACTIVATE | win32con.SWP_SHOWWINDOW |
+                     win32con.SWP_NOSENDCHANGING)
+            positioned = False
+            
             # Get the target window for the monitor
             monitor_window = win32gui.WindowFromPoint((x, y))
             if monitor_window:
@@ -756,30 +1516,21 @@ class WindowManager:
                         # Attach to the window's thread
                         attached = win32process.AttachThreadInput(current_thread, window_thread, True)
                         if attached:
-                            # Move and show the window while attached
-                            win32gui.SetWindowPos(
-                                hwnd,
-                                win32con.HWND_TOPMOST,
-                                x, y,
-                                100, 100,
-                                win32con.SWP_NOSIZE | win32con.SWP_NOACTIVATE | win32con.SWP_SHOWWINDOW
-                            )
-                            # Detach from the thread
-                            win32process.AttachThreadInput(current_thread, window_thread, False)
+                            try:
+                                # Move and show the window while attached
+                                win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, x, y, 100, 100, flags)
+                                positioned = True
+                            finally:
+                                # Detach from the thread
+                                win32process.AttachThreadInput(current_thread, window_thread, False)
                     except Exception as e:
                         logging.warning(f"Thread attachment failed: {e}")
             
-            # If thread attachment failed or wasn't needed, still try to show the window
-            win32gui.SetWindowPos(
-                hwnd,
-                win32con.HWND_TOPMOST,
-                x, y,
-                100, 100,
-                win32con.SWP_NOSIZE | win32con.SWP_NOACTIVATE | win32con.SWP_SHOWWINDOW
-            )
+            # If thread attachment failed or wasn't needed, position and show the window now
+            if not positioned:
+                win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, x, y, 100, 100, flags)
             
-            # Force window to be visible
-            win32gui.ShowWindow(hwnd, win32con.SW_SHOWNA)
+            # SWP_SHOWWINDOW has shown it; paint it right away
             win32gui.UpdateWindow(hwnd)
             
             return hwnd
@@ -788,37 +1539,244 @@ class WindowManager:
             logging.error(f"Failed to create overlay window: {e}")
             return None
 
-    def highlight_window(self, hwnd, highlight=True):
-        """Add or remove green highlight from a window."""
-        try:
-            if not win32gui.IsWindow(hwnd):
+    def invalidate_monitor_cache(self):
+        """Forget which monitor each window was on, after the display layout changed."""
+        self._monitor_cache.clear()
+    
+    def _window_monitor(self, hwnd, rect):
+        """Get the monitor handle and rect for a window, reusing the last lookup.
+        
+        The cached monitor is kept while the window's center stays inside it.
+        """
+        cached = self._monitor_cache.get(hwnd)
+        if cached:
+            m_left, m_top, m_right, m_bottom = cached[1]
+            center_x = (rect[0] + rect[2]) // 2
+            center_y = (rect[1] + rect[3]) // 2
+            if m_left <= center_x < m_right and m_top <= center_y < m_bottom:
+                return cached
+        
+        monitor = win32api.MonitorFromWindow(hwnd)
+        cached = (monitor, win32api.GetMonitorInfo(monitor)['Monitor'])
+        self._monitor_cache[hwnd] = cached
+        return cached
+    
+    def start_overlay_worker(self):
+        """Start the thread that creates and moves the overlay windows.
+        
+        Calls like AttachThreadInput and SetWindowPos on other processes'
+        windows can stall, so they run here instead of on Tk's thread. The
+        thread owns the overlays and pumps their messages; jobs are queued
+        and a WM_APP posted to its message-only window wakes it up.
+        """
+        def worker_wndproc(hwnd, msg, wparam, lparam):
+            if msg == win32con.WM_APP:
+                self._run_overlay_jobs()
+                return 0
+            elif msg == win32con.WM_DESTROY:
+                win32gui.PostQuitMessage(0)
+                return 0
+            return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+        def run_overlay_worker():
+            try:
+                hInstance = win32api.GetModuleHandle(None)
+                class_name = f'GreenHouseOverlayWorker_{id(self)}'
+                
+                wndClass = win32gui.WNDCLASS()
+                wndClass.lpfnWndProc = worker_wndproc
+                wndClass.lpszClassName = class_name
+                wndClass.hInstance = hInstance
+                
+                try:
+                    win32gui.RegisterClass(wndClass)
+                except win32gui.error as e:
+                    if e.winerror != 1410:  # Ignore "Class already exists"
+                        raise
+                
+                self.overlay_worker_hwnd = win32gui.CreateWindowEx(
+                    0, class_name, None, 0, 0, 0, 0, 0,
+                    win32con.HWND_MESSAGE, None, hInstance, None
+                )
+                self._run_overlay_jobs()  # Jobs queued before the window existed
+                
+                win32gui.PumpMessages()
+            except Exception as e:
+                logging.error(f"Error in overlay thread: {str(e)}")
+            finally:
+                self.overlay_worker_hwnd = None
+
+        self.overlay_thread = threading.Thread(target=run_overlay_worker, daemon=True)
+        self.overlay_thread.start()
+
+    def stop_overlay_worker(self):
+        """Stop the overlay thread once it has run the jobs already queued."""
+        if self.overlay_worker_hwnd:
+            win32gui.PostMessage(self.overlay_worker_hwnd, win32con.WM_CLOSE, 0, 0)
+        if self.overlay_thread:
+            self.overlay_thread.join(timeout=1.0)
+
+    def _post_overlay_job(self, func, *args):
+        """Queue a call to run on the overlay thread."""
+        self._overlay_jobs.put((func, args))
+        hwnd = self.overlay_worker_hwnd
+        if hwnd:
+            try:
+                win32gui.PostMessage(hwnd, win32con.WM_APP, 0, 0)
+            except win32gui.error:
+                pass  # The thread is shutting down
+
+    def _run_overlay_jobs(self):
+        """Run every queued overlay job, on the overlay thread."""
+        while True:
+            try:
+                func, args = self._overlay_jobs.get_nowait()
+            except queue.Empty:
                 return
+            try:
+                func(*args)
+            except Exception as e:
+                logging.error(f"Overlay job failed: {e}")
 
-            # Get target window position and size
-            rect = win32gui.GetWindowRect(hwnd)
-            left, top, right, bottom = rect
-            width = right - left
-            height = bottom - top
+    def begin_overlay_batch(self):
+        """Start collecting overlay updates so they are applied at once.
+        
+        Returns:
+            Batch to pass to highlight_window() and end_overlay_batch()
+        """
+        return []
+    
+    def end_overlay_batch(self, batch):
+        """Apply every overlay update collected in a batch at once."""
+        if batch:
+            self._post_overlay_job(self._apply_overlay_updates, batch)
+    
+    def highlight_window(self, hwnd, highlight=True, batch=None):
+        """Add or remove green highlight from a window.
+        
+        The target window is measured here; its overlay is created and moved
+        on the overlay thread.
+        
+        Args:
+            hwnd: Window to highlight
+            highlight: Show the overlay if True, hide it if False
+            batch: Batch from begin_overlay_batch(), the update is sent immediately if None
+        
+        Returns:
+            The batch to use for the next update, None if not batching
+        """
+        rect = None
+        if highlight:
+            try:
+                if not win32gui.IsWindow(hwnd):
+                    return batch
+                
+                # Get target window position and size
+                rect = win32gui.GetWindowRect(hwnd)
+                
+                # Get the monitor info for the target window
+                monitor, monitor_rect = self._window_monitor(hwnd, rect)
+                logging.info(f"Target window {hwnd} on monitor: {monitor_rect}")
+            except Exception as e:
+                logging.error(f"Failed to highlight window {hwnd}: {str(e)}")
+                return batch
+        
+        update = (hwnd, rect)  # No rect hides the overlay
+        if batch is not None:
+            batch.append(update)
+            return batch
+        self._post_overlay_job(self._apply_overlay_updates, [update])
+        return None
+    
+    def highlight_windows_batch(self, hwnds, highlight=True):
+        """Add or remove the highlight of several windows in one batch.
+        
+        Args:
+            hwnds: Windows to update
+            highlight: Show the overlays if True, hide them if False
+        """
+        batch = self.begin_overlay_batch()
+        for hwnd in hwnds:
+            batch = self.highlight_window(hwnd, highlight, batch)
+        self.end_overlay_batch(batch)
+    
+    def _apply_overlay_updates(self, updates):
+        """Show or hide overlays in one DeferWindowPos batch, on the overlay thread.
+        
+        Args:
+            updates: List of (hwnd, rect) pairs; rect is the target window's
+                GetWindowRect(), or None to hide its overlay
+        """
+        hdwp = None
+        if len(updates) > 1:
+            try:
+                hdwp = win32gui.BeginDeferWindowPos(len(updates))
+            except win32gui.error:
+                pass  # Update them one by one
+        for hwnd, rect in updates:
+            hdwp = self._update_overlay(hwnd, rect, hdwp)
+        if hdwp:
+            win32gui.EndDeferWindowPos(hdwp)
+    
+    def _update_overlay(self, hwnd, rect, hdwp=None):
+        """Show a window's overlay over rect, or hide it if rect is None.
+        
+        Args:
+            hwnd: Target window
+            rect: Target window rect, None to hide the overlay
+            hdwp: DeferWindowPos handle, the overlay is updated immediately if None
+        
+        Returns:
+            The DeferWindowPos handle to use for the next update
+        """
+        flags = win32con.SWP_NOACTIVATE | win32con.SWP_NOSENDCHANGING
+        try:
+            if rect is None:
+                if hwnd not in self.overlay_windows:
+                    return hdwp  # Never shown
+            else:
+                left, top, right, bottom = rect
+                width = right - left
+                height = bottom - top
 
-            # Get the monitor info for the target window
-            monitor = win32api.MonitorFromWindow(hwnd)
-            monitor_info = win32api.GetMonitorInfo(monitor)
-            monitor_rect = monitor_info['Monitor']
-            logging.info(f"Target window {hwnd} on monitor: {monitor_rect}")
-
-            # Create overlay if it doesn't exist yet
-            if hwnd not in self.overlay_windows:
-                overlay_hwnd = self.create_overlay_window(left, top)  # Create at target position
-                if overlay_hwnd:
-                    self.overlay_windows[hwnd] = overlay_hwnd
-                    logging.info(f"Created overlay {overlay_hwnd} for window {hwnd}")
-                else:
-                    return
+                # Create overlay if it doesn't exist yet
+                if hwnd not in self.overlay_windows:
+                    overlay_hwnd = self.create_overlay_window(left, top)  # Create at target position
+                    if overlay_hwnd:
+                        self.overlay_windows[hwnd] = overlay_hwnd
+                        logging.info(f"Created overlay {overlay_hwnd} for window {hwnd}")
+                    else:
+                        return hdwp
 
             overlay_hwnd = self.overlay_windows[hwnd]
+            
+            # Nothing to do if the overlay is already showing over the window
+            if rect is not None:
+                overlay_rect = (left, top, width, height)
+                if (self._overlay_last_rect.get(hwnd) == overlay_rect and
+                        win32gui.IsWindowVisible(overlay_hwnd)):
+                    return hdwp
+            
+            if hdwp:
+                try:
+                    if rect is not None:
+                        hdwp = win32gui.DeferWindowPos(hdwp, overlay_hwnd, win32con.HWND_TOPMOST,
+                                                       left, top, width, height,
+                                                       flags | win32con.SWP_SHOWWINDOW)
+                        self._overlay_last_rect[hwnd] = overlay_rect
+                    else:
+                        hdwp = win32gui.DeferWindowPos(hdwp, overlay_hwnd, 0, 0, 0, 0, 0,
+                                                       flags | win32con.SWP_HIDEWINDOW | win32con.SWP_NOMOVE |
+                                                       win32con.SWP_NOSIZE | win32con.SWP_NOZORDER)
+                        self._overlay_last_rect.pop(hwnd, None)
+                    return hdwp
+                except win32gui.error as e:
+                    # A failed DeferWindowPos frees the batch; finish this and later updates directly
+                    logging.warning(f"Batched overlay update failed for {hwnd}: {e}")
+                    hdwp = None
 
             # Update position and show/hide
-            if highlight:
+            if rect is not None:
                 # Position and show the overlay
                 win32gui.SetWindowPos(
                     overlay_hwnd,
@@ -827,47 +1785,52 @@ class WindowManager:
                     top,
                     width,
                     height,
-                    win32con.SWP_NOACTIVATE | win32con.SWP_SHOWWINDOW
+                    flags | win32con.SWP_SHOWWINDOW
                 )
-
-                # Verify overlay is on correct monitor
-                overlay_monitor = win32api.MonitorFromWindow(overlay_hwnd)
-                if overlay_monitor != monitor:
-                    logging.warning("Overlay on wrong monitor, forcing position")
-                    win32gui.SetWindowPos(
-                        overlay_hwnd,
-                        win32con.HWND_TOPMOST,
-                        left,
-                        top,
-                        width,
-                        height,
-                        win32con.SWP_NOACTIVATE | win32con.SWP_SHOWWINDOW
-                    )
-
-                # Force a repaint
-                win32gui.InvalidateRect(overlay_hwnd, None, True)
-                win32gui.UpdateWindow(overlay_hwnd)
+                # No repaint needed: a move reuses the composited surface, and
+                # CS_HREDRAW | CS_VREDRAW has the class brush fill it after a resize
+                self._overlay_last_rect[hwnd] = overlay_rect
             else:
                 # Just hide the overlay
                 win32gui.ShowWindow(overlay_hwnd, win32con.SW_HIDE)
+                self._overlay_last_rect.pop(hwnd, None)
+            return hdwp
 
         except Exception as e:
             logging.error(f"Failed to highlight window {hwnd}: {str(e)}")
+            self._overlay_last_rect.pop(hwnd, None)
             if hwnd in self.overlay_windows:
                 try:
                     win32gui.DestroyWindow(self.overlay_windows[hwnd])
                 except:
                     pass
                 del self.overlay_windows[hwnd]
+            return hdwp
 
     def cleanup_overlays(self):
         """Remove all overlay highlights."""
-        for hwnd, overlay_hwnd in list(self.overlay_windows.items()):
+        self._post_overlay_job(self._destroy_overlays)
+
+    def _destroy_overlays(self):
+        """Destroy every overlay window, on the overlay thread that owns them."""
+        if self.overlay_windows:
+            # Hide every overlay in one screen update, so destroying them repaints nothing
+            flags = (win32con.SWP_HIDEWINDOW | win32con.SWP_NOMOVE | win32con.SWP_NOSIZE |
+                     win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE)
             try:
-                win32gui.DestroyWindow(overlay_hwnd)
-            except:
-                pass
+                hdwp = win32gui.BeginDeferWindowPos(len(self.overlay_windows))
+                for overlay_hwnd in self.overlay_windows.values():
+                    hdwp = win32gui.DeferWindowPos(hdwp, overlay_hwnd, 0, 0, 0, 0, 0, flags)
+                win32gui.EndDeferWindowPos(hdwp)
+            except win32gui.error:
+                pass  # Destroying them below still removes them
+            for overlay_hwnd in self.overlay_windows.values():
+                try:
+                    win32gui.DestroyWindow(overlay_hwnd)
+                except:
+                    pass
         self.overlay_windows.clear()
+        self._overlay_last_rect.clear()
 
 class SettingsDialog:
     """Settings dialog window."""
@@ -915,6 +1878,10 @@ class SettingsDialog:
     def view_file(self, file_path):
         """Open a file in the default text editor."""
         try:
+            # Recent changes live in the change log or in memory until compacted
+            if file_path == self.settings.data_file:
+                self.settings.compact()
+            
             if os.path.exists(file_path):
                 if sys.platform == 'win32':
                     os.startfile(file_path)
@@ -931,9 +1898,94 @@ class SettingsDialog:
         self.settings.set_startup(self.startup_var.get())
         self.dialog.destroy()
 
+class RestorePromptDialog:
+    """Asks which of several relaunched windows should get their saved position back."""
+    
+    def __init__(self, parent, prompts, on_close):
+        """
+        Args:
+            parent: Parent window
+            prompts: List of (hwnd, saved_data) tuples to ask about
+            on_close: Called with the accepted (hwnd, saved_data) tuples, empty if skipped
+        """
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Restore Window Positions")
+        self.dialog.geometry("420x300")
+        # A transient window is hidden along with its master, and the main window
+        # usually sits withdrawn in the tray, so only tie the dialog to it when shown
+        if parent.winfo_viewable():
+            self.dialog.transient(parent)
+        self.dialog.attributes('-topmost', True)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.skip)
+        
+        self.prompts = prompts
+        self.on_close = on_close
+        
+        # Main frame with padding
+        frame = ttk.Frame(self.dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        text = ("This window was previously saved. Do you want to restore its position?"
+                if len(prompts) == 1 else
+                "These windows were previously saved. Select the ones whose position you want to restore.")
+        ttk.Label(frame, text=text, wraplength=390).pack(fill='x', pady=(0, 5))
+        
+        # Buttons
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(side=tk.BOTTOM, pady=10)
+        ttk.Button(btn_frame, text="Restore", command=self.restore).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Skip", command=self.skip).pack(side=tk.LEFT)
+        
+        # Scrollable list with one checkbox per window, all checked
+        list_frame = ttk.Frame(frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        canvas = tk.Canvas(list_frame, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=canvas.yview)
+        rows = ttk.Frame(canvas)
+        rows.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=rows, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.vars = []
+        for hwnd, saved_data in prompts:
+            info = saved_data.get("info", {})
+            var = tk.BooleanVar(value=True)
+            ttk.Checkbutton(rows, text=f"{info.get('process_name', '')} - {info.get('title', '')}",
+                            variable=var).pack(anchor='w', pady=2)
+            self.vars.append(var)
+        
+        # Show the dialog on top, and only grab input once it is actually visible
+        self.dialog.lift()
+        self.dialog.focus_force()
+        self.dialog.wait_visibility()
+        self.dialog.grab_set()
+    
+    def restore(self):
+        """Restore the checked windows and close the dialog."""
+        accepted = [prompt for prompt, var in zip(self.prompts, self.vars) if var.get()]
+        self.dialog.destroy()
+        self.on_close(accepted)
+    
+    def skip(self):
+        """Close the dialog without restoring anything."""
+        self.dialog.destroy()
+        self.on_close([])
+
 class WindowManagerGUI:
     """GUI interface for the window manager."""
     
+    REFRESH_INTERVAL_MS = 2000  # Shortest time between window state checks, as when they were polled
+    REFRESH_SETTLE_MS = 200  # Wait after a window event, so a burst of them is checked once
+    REFRESH_DUTY_CYCLE = 0.05  # Largest share of main thread time spent checking
+    COMPACT_INTERVAL_MS = 60000  # How often the change log is folded into the data file
+    # Window events that can change what check_window_states() sees: windows
+    # created, destroyed, shown or hidden, renamed, minimized or restored
+    WINDOW_EVENTS = [(EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE),
+                     (EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE),
+                     (EVENT_SYSTEM_MINIMIZESTART, EVENT_SYSTEM_MINIMIZEEND)]
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Greenhouse - Window Position Manager")
@@ -942,15 +1994,30 @@ class WindowManagerGUI:
         self.window_manager = WindowManager()
         self.is_focused = False  # Add focus tracking
         self.highlighted_windows = set()  # Track which windows are currently highlighted
-        self.last_selection_time = {}  # Track last selection time for each window
+        self.last_selection_time = {}  # Last selection time for each window, in _now_ms() milliseconds
         self.debounce_delay = 200  # Milliseconds to wait before processing selection
-        self.pending_highlights = {}  # Track pending highlight operations
+        self._pending_highlight_ops = {}  # Window handle -> latest deferred selected state
+        self._highlight_flush_scheduled = False
+        self._positions_flush_id = None  # Pending deferred write of saved positions
+        self._handling_restore = {}  # Windows with a restore prompt queued or showing
+        self._pending_restore_prompts = []  # (hwnd, saved_data) waiting for the next dialog
+        self._restore_prompt_scheduled = False
+        self._icon_drain_scheduled = False
+        self._refresh_times = deque(maxlen=10)  # Recent check_window_states durations, in seconds
+        self._refresh_delay = self.REFRESH_INTERVAL_MS  # Adaptive time between checks
+        self._last_refresh_ms = 0  # _now_ms() when the last check ran
+        self._windows_dirty = False  # A window changed since the last check
+        self._restore_candidates = set()  # Lowercased process names of saved windows not running
+        self._suppress_focus_events = False  # Ignore Tk focus events while hidden in the tray
+        self._win_event_proc = None
+        self._win_event_hooks = []
         
         self.setup_gui()
         self.setup_tray()
         
         # Start monitor detection
-        self.window_manager.start_monitor_check(self.on_monitors_reconnected)
+        # Display changes arrive on the listener thread; Tk must only be used from this one
+        self.window_manager.start_monitor_check(lambda: self.root.after(0, self.on_monitors_reconnected))
         
         # Handle window close button to minimize to tray instead
         self.root.protocol("WM_DELETE_WINDOW", self.minimize_to_tray)
@@ -972,10 +2039,14 @@ class WindowManagerGUI:
         style.configure('White.TLabel', background='white')
         style.configure('Hover.TFrame', background='#F0F0F0')  # Light gray for hover
         style.configure('Hover.TLabel', background='#F0F0F0')
-        style.configure('Selected.TFrame', background='#2E8B57')  # Sea Green
-        style.configure('Selected.TLabel', background='#2E8B57', foreground='white')
-        style.configure('Inactive.TFrame', background='#93e9be')  # Very light green
-        style.configure('Inactive.TLabel', background='#93e9be', foreground='#757575')  # Gray text
+        
+        # Listbox rows: 'selected' is Sea Green, 'alternate' (not running) very light green
+        style.configure('Row.TFrame', background='white')
+        style.configure('Row.TLabel', background='white')
+        style.map('Row.TFrame', background=[('alternate', '#93e9be'), ('selected', '#2E8B57')])
+        style.map('Row.TLabel',
+                  background=[('alternate', '#93e9be'), ('selected', '#2E8B57')],
+                  foreground=[('alternate', '#757575'), ('selected', 'white')])  # Gray text when inactive
         
         # Add instruction label
         instruction_label = ttk.Label(main_frame, text="Select windows to save their position:", 
@@ -1013,167 +2084,236 @@ class WindowManagerGUI:
         
         # Start window state monitoring
         self.start_window_monitor()
+        self.root.after(self.COMPACT_INTERVAL_MS, self._compact_positions)
 
     def start_window_monitor(self):
-        """Start periodic window state checking."""
+        """Check window states now, and again whenever a top-level window changes."""
+        # Out-of-context hooks call back on this thread from Tk's message loop
+        self._win_event_proc = WinEventProc(self._on_win_event)  # Must stay alive while hooked
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        for first, last in self.WINDOW_EVENTS:
+            hook = ctypes.windll.user32.SetWinEventHook(first, last, None, self._win_event_proc, 0, 0, flags)
+            if hook:
+                self._win_event_hooks.append(hook)
+            else:
+                logging.error(f"Failed to hook window events {first:#06x}-{last:#06x}")
+        self._refresh_window_states()
+
+    def stop_window_monitor(self):
+        """Remove the window event hooks."""
+        for hook in self._win_event_hooks:
+            ctypes.windll.user32.UnhookWinEvent(hook)
+        self._win_event_hooks.clear()
+
+    def _on_win_event(self, hook, event, hwnd, id_object, id_child, event_thread, event_time):
+        """Schedule one state check for a burst of relevant window events.
+        
+        Events fire for every tooltip, menu and title change on the desktop, so
+        only ones that can change the list get through: any event for a listed
+        window, a window becoming trackable, and new windows of saved programs
+        that aren't running yet.
+        """
+        if id_object != OBJID_WINDOW or id_child != CHILDID_SELF or not hwnd:
+            return
+        if hwnd not in self.window_listbox.items_by_hwnd:
+            if event in (EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE):
+                return  # Nothing listed went away
+            if ctypes.windll.user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+                return  # Child window
+            if not is_trackable_window(hwnd):
+                if event not in (EVENT_OBJECT_CREATE, EVENT_OBJECT_SHOW) or not self._is_restore_candidate(hwnd):
+                    return
+        if not self._windows_dirty:
+            self._windows_dirty = True
+            # Let the burst settle, and keep checks at least _refresh_delay apart;
+            # run the check once Tk has finished pending redraws
+            wait = self._last_refresh_ms + self._refresh_delay - self._now_ms()
+            self.root.after(max(self.REFRESH_SETTLE_MS, wait), self.root.after_idle, self._reconcile_if_dirty)
+
+    def _is_restore_candidate(self, hwnd):
+        """Check if a window belongs to a saved program that has no window open yet."""
+        if not self._restore_candidates:
+            return False
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        exe_path = exe_for_pid(pid)
+        return bool(exe_path) and os.path.basename(exe_path).lower() in self._restore_candidates
+
+    def _reconcile_if_dirty(self):
+        """Run the state check scheduled by a window event."""
+        if self._windows_dirty:
+            self._windows_dirty = False
+            self._refresh_window_states()
+
+    def _refresh_window_states(self):
+        """Check window states and adapt how long the next check waits."""
+        self._last_refresh_ms = self._now_ms()
+        start = time.perf_counter()
         self.check_window_states()
-        # Check every 2 seconds
-        self.root.after(2000, self.start_window_monitor)
+        self._refresh_times.append(time.perf_counter() - start)
+        
+        # Back off on machines where a check is slow or erratic
+        cost = statistics.mean(self._refresh_times) + 3 * statistics.pstdev(self._refresh_times)
+        self._refresh_delay = max(self.REFRESH_INTERVAL_MS, int(cost * 1000 / self.REFRESH_DUTY_CYCLE))
 
     def check_window_states(self):
         """Check if any windows have been closed or launched and update UI."""
         current_windows = {}
-        changes = False
+        restore_prompts = []  # Asked once the list has been updated
         
-        # Get current window list with full info
+        # Get current window list with full info, and index it by what saved
+        # windows are matched on; the first window in enumeration order wins
+        current_by_key = {}
         for hwnd, title, process_name in self.window_manager.enum_windows():
+            process_name_lc = process_name.lower()
             current_windows[hwnd] = {
                 'title': title,
-                'process_name': process_name
+                'process_name': process_name,
+                'process_name_lc': process_name_lc
             }
+            current_by_key.setdefault((process_name_lc, title), hwnd)
         
-        # Load saved positions once and make a copy for safe iteration
-        saved_positions = dict(self.window_manager.settings.load_window_positions())
+        # Load saved positions once (a copy, so it's safe to iterate)
+        saved_positions = self.window_manager.settings.load_window_positions()
+        # Match keys for the saved windows, lowercased once for both passes below
+        saved_keys = {}
+        for hwnd_str, saved_data in saved_positions.items():
+            saved_info = saved_data.get("info", {})
+            saved_keys[hwnd_str] = (saved_info.get('process_name', '').lower(), saved_info.get('title', ''))
         
         # Set flag to prevent removing saved positions during window close handling
         self._handling_window_close = True
         try:
-            # First check if any saved but inactive windows have become active
-            for hwnd_str, saved_data in list(saved_positions.items()):
-                hwnd = int(hwnd_str)
-                saved_info = saved_data.get("info", {})
+            with self.window_listbox.batch():
+                # The listbox keeps this up to date as items change below
+                items_by_hwnd = self.window_listbox.items_by_hwnd
                 
-                # Look for a matching window in current_windows
-                for current_hwnd, current_info in current_windows.items():
-                    if (current_info['process_name'].lower() == saved_info.get('process_name', '').lower() and
-                        current_info['title'] == saved_info.get('title', '')):
-                        # Found a match - check if it was previously inactive
-                        for item in self.window_listbox.items:
-                            if (item.get('hwnd') == hwnd and 
-                                item.get('inactive', False)):
-                                changes = True
-                                # Update item with new hwnd and mark as active
-                                item['hwnd'] = current_hwnd
-                                self._update_item_state(item, True)
-                                # Ask to restore position
-                                self.ask_restore_window(current_hwnd, saved_data)
-                                break
-            
-            # Then check current items in the listbox
-            for item in list(self.window_listbox.items):
-                hwnd = item['hwnd']
-                was_active = not item.get('inactive', False)
-                is_active = hwnd in current_windows
+                # First check if any saved but inactive windows have become active
+                for hwnd_str, saved_data in saved_positions.items():
+                    hwnd = int(hwnd_str)
+                    
+                    # Look for a matching window in current_windows
+                    current_hwnd = current_by_key.get(saved_keys[hwnd_str])
+                    if current_hwnd is None:
+                        continue
+                    
+                    # Found a match - check if it was previously inactive
+                    item = items_by_hwnd.get(hwnd)
+                    if item and item.get('inactive', False):
+                        # Update item with new hwnd and mark as active
+                        self.window_listbox.set_item_hwnd(item, current_hwnd)
+                        self._update_item_state(item, True)
+                        # Ask to restore position
+                        restore_prompts.append((current_hwnd, saved_data))
                 
-                if was_active != is_active:
-                    changes = True
-                    self._update_item_state(item, is_active)
-            
-            # Finally check for any new windows that match saved positions
-            for hwnd_str, saved_data in list(saved_positions.items()):
-                saved_info = saved_data.get("info", {})
-                # Skip if we already have this window in our list
-                if any(item['hwnd'] == int(hwnd_str) for item in self.window_listbox.items):
-                    continue
+                # Then check current items in the listbox
+                for item in list(self.window_listbox.items):
+                    hwnd = item['hwnd']
+                    was_active = not item.get('inactive', False)
+                    is_active = hwnd in current_windows
+                    
+                    if was_active != is_active:
+                        self._update_item_state(item, is_active)
                 
-                # Look for matching window in current_windows
-                for current_hwnd, current_info in current_windows.items():
-                    if (current_info['process_name'].lower() == saved_info.get('process_name', '').lower() and
-                        current_info['title'] == saved_info.get('title', '')):
-                        # Found a new match - add to list
-                        changes = True
-                        self.window_listbox.insert(tk.END, None, 
-                                                 current_info['process_name'], 
-                                                 current_info['title'], 
-                                                 current_hwnd)
-                        # Select it since it was saved
-                        last_item = self.window_listbox.items[-1]
-                        last_item['saved_info'] = saved_data
-                        self.window_listbox._on_item_click(last_item)
-                        # Ask to restore position
-                        self.ask_restore_window(current_hwnd, saved_data)
-                        break
+                # Finally check for any new windows that match saved positions
+                for hwnd_str, saved_data in saved_positions.items():
+                    # Skip if we already have this window in our list
+                    if int(hwnd_str) in items_by_hwnd:
+                        continue
+                    
+                    # Look for matching window in current_windows, unless it is already listed
+                    current_hwnd = current_by_key.get(saved_keys[hwnd_str])
+                    if current_hwnd is None or current_hwnd in items_by_hwnd:
+                        continue
+                    
+                    # Found a new match - add to list
+                    current_info = current_windows[current_hwnd]
+                    self.window_listbox.insert(tk.END, None, 
+                                             current_info['process_name'], 
+                                             current_info['title'], 
+                                             current_hwnd)
+                    # Select it since it was saved
+                    last_item = self.window_listbox.items[-1]
+                    last_item['saved_info'] = saved_data
+                    self.window_listbox._on_item_click(last_item)
+                    # Ask to restore position
+                    restore_prompts.append((current_hwnd, saved_data))
+            
+            for hwnd, saved_data in restore_prompts:
+                self.ask_restore_window(hwnd, saved_data)
+            
+            # Programs whose saved windows may still open; their new windows aren't filtered out
+            self._restore_candidates = {key[0] for key in saved_keys.values() if key not in current_by_key}
         
         finally:
             # Clear the flag
             self._handling_window_close = False
 
-        if changes:
-            self.window_listbox.update_idletasks()
-
     def _update_item_state(self, item, is_active):
         """Update the visual state of a listbox item."""
-        if is_active:
-            # For active items, use Selected style if selected, otherwise White
-            style_suffix = 'Selected.TFrame' if item['index'] in self.window_listbox.selected_indices else 'White.TFrame'
-            label_suffix = 'Selected.TLabel' if item['index'] in self.window_listbox.selected_indices else 'White.TLabel'
-            bg_color = '#2E8B57' if item['index'] in self.window_listbox.selected_indices else 'white'
-            # Remove "(NOT RUNNING)" from process name if it exists
-            process_text = item['process_label'].cget('text')
-            if "(NOT RUNNING)" in process_text:
-                process_text = process_text.replace(" (NOT RUNNING)", "")
-                item['process_label'].configure(text=process_text)
-        else:
-            # For inactive items, always use Inactive style
-            style_suffix = 'Inactive.TFrame'
-            label_suffix = 'Inactive.TLabel'
-            bg_color = '#E8F5E9'  # Very light green
-            # Add "(NOT RUNNING)" to process name if not already there
-            process_text = item['process_label'].cget('text')
-            if "(NOT RUNNING)" not in process_text:
-                process_text = f"{process_text} (NOT RUNNING)"
-                item['process_label'].configure(text=process_text)
-        
-        # Update item state
-        item['inactive'] = not is_active
-        
-        # Update styles
-        for widget in [item['container'], item['frame'], item['icon_frame'], item['text_frame']]:
-            widget.configure(style=style_suffix)
-        
-        for widget in [item['process_label'], item['title_label']]:
-            widget.configure(style=label_suffix)
-        
-        if item['icon_label']:
-            item['icon_label'].configure(bg=bg_color)
+        # The listbox derives the style and "(NOT RUNNING)" suffix from this flag
+        inactive = not is_active
+        if item.get('inactive', False) == inactive:
+            return  # Already drawn this way
+        item['inactive'] = inactive
+        self.window_listbox.redraw_item(item)
+
+    @staticmethod
+    def _now_ms():
+        """Get a millisecond timestamp that never jumps when the wall clock is adjusted."""
+        return time.monotonic_ns() // 1_000_000
 
     def _debounced_highlight(self, hwnd, selected):
         """Process the highlight after debounce delay."""
         # Cancel any pending highlight for this window
-        if hwnd in self.pending_highlights:
-            self.root.after_cancel(self.pending_highlights[hwnd])
-            del self.pending_highlights[hwnd]
+        self._pending_highlight_ops.pop(hwnd, None)
 
         # Schedule the highlight operation
-        current_time = time.time() * 1000  # Convert to milliseconds
+        current_time = self._now_ms()
         last_time = self.last_selection_time.get(hwnd, 0)
         
         if current_time - last_time > self.debounce_delay:
             self._process_highlight(hwnd, selected)
         else:
-            # Schedule the highlight for later
-            self.pending_highlights[hwnd] = self.root.after(
-                self.debounce_delay,
-                lambda: self._process_highlight(hwnd, selected)
-            )
+            # Queue the highlight for the next flush; the latest state per window wins
+            self._pending_highlight_ops[hwnd] = selected
+            if not self._highlight_flush_scheduled:
+                self._highlight_flush_scheduled = True
+                self.root.after(self.debounce_delay, self._flush_highlights)
+
+    def _flush_highlights(self):
+        """Apply every queued highlight in one overlay batch."""
+        self._highlight_flush_scheduled = False
+        ops, self._pending_highlight_ops = self._pending_highlight_ops, {}
+        if not ops:
+            return
+        
+        batch = self.window_manager.begin_overlay_batch()
+        for hwnd, selected in ops.items():
+            batch = self._process_highlight(hwnd, selected, batch)
+        self.window_manager.end_overlay_batch(batch)
 
-    def _process_highlight(self, hwnd, selected):
-        """Actually perform the highlight operation."""
-        self.last_selection_time[hwnd] = time.time() * 1000
+    def _process_highlight(self, hwnd, selected, batch=None):
+        """Actually perform the highlight operation.
+        
+        Returns:
+            The overlay batch to use next, see WindowManager.highlight_window()
+        """
+        self.last_selection_time[hwnd] = self._now_ms()
         
         if selected:
             if self.is_focused and hwnd not in self.highlighted_windows:
-                self.window_manager.highlight_window(hwnd, True)
+                batch = self.window_manager.highlight_window(hwnd, True, batch)
                 self.highlighted_windows.add(hwnd)
         else:
             if hwnd in self.highlighted_windows:
-                self.window_manager.highlight_window(hwnd, False)
+                batch = self.window_manager.highlight_window(hwnd, False, batch)
                 self.highlighted_windows.remove(hwnd)
+        return batch
 
     def on_window_selection_change(self, hwnd, selected):
         """Handle window selection changes with debouncing."""
         # Find the item for this hwnd
-        item = next((item for item in self.window_listbox.items if item['hwnd'] == hwnd), None)
+        item = self.window_listbox.items_by_hwnd.get(hwnd)
         if not item:
             return
 
@@ -1187,23 +2327,20 @@ class WindowManagerGUI:
         # If window is selected and running, save its position
         if selected and win32gui.IsWindow(hwnd):
             try:
+                # Saves to disk immediately when a window is selected
                 self.window_manager.save_window_position(hwnd)
-                # Save to disk immediately when a window is selected
-                self.window_manager.save_positions_to_disk()
             except Exception as e:
                 logging.error(f"Failed to save window position: {e}")
         # If window is explicitly deselected by user and is currently running
-        elif not selected and win32gui.IsWindow(hwnd) and not hasattr(self, '_handling_window_close'):
+        elif not selected and win32gui.IsWindow(hwnd) and not getattr(self, '_handling_window_close', False):
             try:
                 # Remove from in-memory positions
                 if hwnd in self.window_manager.saved_window_positions:
                     del self.window_manager.saved_window_positions[hwnd]
                 
-                # Remove from saved positions file
-                saved_positions = self.window_manager.settings.load_window_positions()
-                if str(hwnd) in saved_positions:
-                    del saved_positions[str(hwnd)]
-                    self.window_manager.settings.save_window_positions(saved_positions)
+                # Remove from saved positions, writing the log once deselecting settles
+                if self.window_manager.settings.append_mutation("del", hwnd, defer=True):
+                    self._schedule_positions_flush()
                     logging.info(f"Removed window {hwnd} from saved positions")
             except Exception as e:
                 logging.error(f"Failed to remove window position for {hwnd}: {e}")
@@ -1211,119 +2348,171 @@ class WindowManagerGUI:
         # Normal selection handling for active windows
         self._debounced_highlight(hwnd, selected)
     
+    def _schedule_positions_flush(self):
+        """Write deferred position changes once no more arrive for 500 ms."""
+        if self._positions_flush_id:
+            self.root.after_cancel(self._positions_flush_id)
+        self._positions_flush_id = self.root.after(500, self._flush_positions)
+
+    def _flush_positions(self):
+        """Write deferred position changes to disk."""
+        self._positions_flush_id = None
+        try:
+            self.window_manager.settings.flush()
+        except Exception as e:
+            logging.error(f"Failed to save window positions: {e}")
+
+    def _compact_positions(self):
+        """Periodically fold the change log into the data file."""
+        try:
+            self.window_manager.settings.compact()
+        except Exception as e:
+            logging.error(f"Failed to compact saved positions: {e}")
+        self.root.after(self.COMPACT_INTERVAL_MS, self._compact_positions)
+
     def refresh_windows(self):
         """Update the list of windows in the GUI."""
-        self.window_listbox.delete(0, tk.END)
+        # Icons queued for the old list are requested again below if still needed
+        self.window_manager.cancel_icon_requests()
         current_windows = self.window_manager.enum_windows()
         current_hwnds = {hwnd for hwnd, _, _ in current_windows}
+        restore_prompts = []  # Asked once the list has been populated
         
-        # First add saved but not currently running windows at the top
+        # First saved but not currently running windows at the top
+        rows = []
         saved_positions = self.window_manager.settings.load_window_positions()
         for hwnd_str, data in saved_positions.items():
             hwnd = int(hwnd_str)
             if hwnd not in current_hwnds:  # Window is saved but not running
                 window_info = data.get("info", {})
                 if window_info:  # Only add if we have window info
-                    self.window_listbox.insert(tk.END, None, 
-                                             window_info.get("process_name", "Unknown"), 
-                                             window_info.get("title", "Unknown"), 
-                                             hwnd)
-                    # Mark as selected and inactive
-                    last_item = self.window_listbox.items[-1]
-                    last_item['inactive'] = True  # Mark as inactive
-                    last_item['saved_info'] = data  # Store saved info for later
-                    self._update_item_state(last_item, False)  # Apply inactive style
+                    rows.append((None, window_info.get("process_name", "Unknown"),
+                                 window_info.get("title", "Unknown"), hwnd))
         
-        # Then add all currently running windows
+        # Then all currently running windows
         for hwnd, title, process_name in current_windows:
-            # Check if this window was previously saved but inactive
-            was_inactive = False
-            saved_info = None
-            if str(hwnd) in saved_positions:
-                saved_info = saved_positions[str(hwnd)]
-                # Check if we had this in our inactive list
-                for item in self.window_listbox.items:
-                    if item.get('hwnd') == hwnd and item.get('inactive', False):
-                        was_inactive = True
-                        break
-
-            self.window_listbox.insert(tk.END, None, process_name, title, hwnd)
-            last_item = self.window_listbox.items[-1]
-            last_item['inactive'] = False
-            if saved_info:
-                last_item['saved_info'] = saved_info
-            
-            # If it was saved, select it
-            if str(hwnd) in saved_positions:
-                self.window_listbox._on_item_click(self.window_listbox.items[-1])
+            rows.append((None, process_name, title, hwnd))
+        
+        with self.window_listbox.batch():
+            for item in self.window_listbox.refresh(rows):
+                hwnd = item['hwnd']
+                saved_info = saved_positions.get(str(hwnd))
+                is_selected = item['index'] in self.window_listbox.selected_indices
+                
+                if hwnd not in current_hwnds:
+                    item['saved_info'] = saved_info  # Store saved info for later
+                    self._update_item_state(item, False)  # Apply inactive style
+                    if is_selected:
+                        self.window_listbox._on_item_click(item)  # Not running, so not selected
+                    continue
+                
+                # Check if this window was previously saved but inactive
+                was_inactive = saved_info is not None and item.get('inactive', False)
+                self._update_item_state(item, True)
+                if saved_info:
+                    item['saved_info'] = saved_info
+                else:
+                    item.pop('saved_info', None)
+                
+                # Saved windows are selected, everything else is not
+                if is_selected != (saved_info is not None):
+                    self.window_listbox._on_item_click(item)
                 
                 # If it was previously inactive, ask about restoration
                 if was_inactive:
-                    self.ask_restore_window(hwnd, saved_info)
+                    restore_prompts.append((hwnd, saved_info))
         
-        # Then load icons in background
-        def load_icons():
-            logging.info(f"Starting icon loading for {len(self.window_listbox.items)} windows")
-            for i, item in enumerate(self.window_listbox.items):
-                try:
-                    hwnd = item['hwnd']
-                    if hwnd in current_hwnds:  # Only try to get icons for running windows
-                        icon = self.window_manager.get_window_icon(hwnd)
-                        if icon:
-                            logging.info(f"Got icon for window {i} (hwnd: {hwnd})")
-                            self.root.after(0, lambda idx=i, ic=icon: self.window_listbox.update_icon(idx, ic))
-                except Exception as e:
-                    logging.error(f"Failed to load icon for window {i} (hwnd: {hwnd}): {str(e)}")
+        for hwnd, saved_info in restore_prompts:
+            self.ask_restore_window(hwnd, saved_info)
         
-        # Start icon loading thread
-        threading.Thread(target=load_icons, daemon=True).start()
+        # Then load icons; uncached ones arrive through _drain_icon_results
+        logging.info(f"Starting icon loading for {len(self.window_listbox.items)} windows")
+        with self.window_listbox.batch():
+            for item in self.window_listbox.items:
+                # Only try to get icons for running windows that don't have one yet
+                if item['hwnd'] in current_hwnds and not item['icon']:
+                    icon = self.window_manager.get_window_icon(item['hwnd'])
+                    if icon:
+                        self.window_listbox.update_icon(item['index'], icon)
+        self._schedule_icon_drain()
+    
+    def _schedule_icon_drain(self):
+        """Poll for extracted icons while any are still being loaded."""
+        if not self._icon_drain_scheduled and self.window_manager.icons_pending():
+            self._icon_drain_scheduled = True
+            self.root.after(16, self._drain_icon_results)
+    
+    def _drain_icon_results(self):
+        """Give icons finished by the worker threads to the listbox."""
+        self._icon_drain_scheduled = False
+        for hwnd, icon in self.window_manager.drain_icon_results():
+            item = self.window_listbox.items_by_hwnd.get(hwnd)
+            if item:
+                logging.info(f"Got icon for window {item['index']} (hwnd: {hwnd})")
+                self.window_listbox.update_icon(item['index'], icon)
+        self._schedule_icon_drain()
     
     def ask_restore_window(self, hwnd, saved_data):
-        """Ask user if they want to restore a window that just became active."""
+        """Ask user if they want to restore a window that just became active.
+        
+        Windows that become active within 300 ms of each other share one dialog.
+        """
         # Check if we're already handling this window
-        if hasattr(self, '_handling_restore') and self._handling_restore.get(hwnd):
+        if self._handling_restore.get(hwnd):
             return
-        
-        # Set handling flag for this window
-        if not hasattr(self, '_handling_restore'):
-            self._handling_restore = {}
         self._handling_restore[hwnd] = True
         
+        self._pending_restore_prompts.append((hwnd, saved_data))
+        if not self._restore_prompt_scheduled:
+            self._restore_prompt_scheduled = True
+            self.root.after(300, self._show_batched_restore_prompt)
+    
+    def _show_batched_restore_prompt(self):
+        """Show one dialog for every restore prompt queued so far."""
+        self._restore_prompt_scheduled = False
+        prompts, self._pending_restore_prompts = self._pending_restore_prompts, []
+        if prompts:
+            RestorePromptDialog(self.root, prompts,
+                                lambda accepted: self._on_restore_prompt_closed(prompts, accepted))
+    
+    def _on_restore_prompt_closed(self, prompts, accepted):
+        """Restore the windows accepted in a restore dialog."""
         try:
-            if messagebox.askyesno("Restore Window Position", 
-                                     "This window was previously saved. Do you want to restore its position?"):
-                # Get the position data from the saved info
-                position_data = saved_data.get("position", None)
-                if position_data:
-                    # Update the in-memory positions first
-                    self.window_manager.saved_window_positions[hwnd] = position_data
-                    # Then restore using the position data
-                    self.window_manager.restore_window_position(hwnd)
-                
+            # Update the in-memory positions first, then restore them in one batch
+            hwnds = []
+            for hwnd, saved_data in accepted:
+                position = position_from_dict(saved_data.get("position"))
+                if position:
+                    self.window_manager.saved_window_positions[hwnd] = position
+                    hwnds.append(hwnd)
+            self.window_manager.restore_window_positions(hwnds)
+            
+            for hwnd, saved_data in accepted:
                 # Find the item in the listbox and update its state
-                for i, item in enumerate(self.window_listbox.items):
-                    if item['hwnd'] == hwnd:
-                        item['inactive'] = False
-                        self._update_item_state(item, True)  # Mark as active
-                        if item['index'] not in self.window_listbox.selected_indices:
-                            self.window_listbox._on_item_click(item)  # Select it if not already selected
-                        
-                        # Get and update the icon
-                        try:
-                            icon = self.window_manager.get_window_icon(hwnd)
-                            if icon:
-                                self.window_listbox.update_icon(i, icon)
-                        except Exception as e:
-                            logging.error(f"Failed to load icon for window {hwnd}: {str(e)}")
-                        break
+                item = self.window_listbox.items_by_hwnd.get(hwnd)
+                if not item:
+                    continue
+                self._update_item_state(item, True)  # Mark as active
+                if item['index'] not in self.window_listbox.selected_indices:
+                    self.window_listbox._on_item_click(item)  # Select it if not already selected
+                
+                # Get and update the icon
+                try:
+                    icon = self.window_manager.get_window_icon(hwnd)
+                    if icon:
+                        self.window_listbox.update_icon(item['index'], icon)
+                    else:
+                        self._schedule_icon_drain()
+                except Exception as e:
+                    logging.error(f"Failed to load icon for window {hwnd}: {str(e)}")
         finally:
-            # Clear the handling flag after a delay
-            self.root.after(1000, lambda: self._clear_restore_flag(hwnd))
+            # Clear the handling flags after a delay
+            for hwnd, _ in prompts:
+                self.root.after(1000, lambda hwnd=hwnd: self._clear_restore_flag(hwnd))
     
     def _clear_restore_flag(self, hwnd):
         """Clear the restore handling flag for a window."""
-        if hasattr(self, '_handling_restore'):
-            self._handling_restore.pop(hwnd, None)
+        self._handling_restore.pop(hwnd, None)
 
     def restore_all(self):
         """Restore all saved window positions."""
@@ -1332,8 +2521,7 @@ class WindowManagerGUI:
             return
             
         # First restore all windows
-        for hwnd in self.window_manager.saved_window_positions:
-            self.window_manager.restore_window_position(hwnd)
+        self.window_manager.restore_window_positions(list(self.window_manager.saved_window_positions))
         
         # Give windows time to settle in their new positions
         self.root.after(100, self._update_overlays_after_restore)
@@ -1346,15 +2534,14 @@ class WindowManagerGUI:
         
         # Re-create overlays for all selected windows if we're focused
         if self.is_focused:
-            for item in self.window_listbox.items:
-                if item['index'] in self.window_listbox.selected_indices:
-                    hwnd = item['hwnd']
-                    if win32gui.IsWindow(hwnd):  # Verify window still exists
-                        self.window_manager.highlight_window(hwnd, True)
-                        self.highlighted_windows.add(hwnd)
+            # Verify the windows still exist
+            hwnds = [hwnd for hwnd in self.window_listbox.selected_hwnds() if win32gui.IsWindow(hwnd)]
+            self.window_manager.highlight_windows_batch(hwnds, True)
+            self.highlighted_windows.update(hwnds)
     
     def on_monitors_reconnected(self):
         """Called when monitors are reconnected."""
+        self.window_manager.invalidate_monitor_cache()
         if self.window_manager.saved_window_positions:
             if messagebox.askyesno("Monitors Detected", 
                                  "Both monitors are now connected. Would you like to restore window positions?"):
@@ -1367,14 +2554,17 @@ class WindowManagerGUI:
     def on_closing(self):
         """Clean up before closing."""
         try:
-            self.window_manager.cleanup_overlays()  # Clean up overlay windows
+            # Overlays and their brush go away with the process; destroying them one by one only delays exit
+            self.window_manager.stop_overlay_worker()
             # Don't save positions to disk here as it might overwrite inactive items
+            self.window_manager.settings.compact()  # Leaves one up-to-date data file and no log
             self.window_manager.stop_monitor_check()
+            self.stop_window_monitor()
+            self.window_manager.stop_icon_workers()
             if self.tray_icon:
                 self.tray_icon.stop()
             self.root.quit()
-            self.root.destroy()
-            sys.exit(0)
+            self.root.destroy()  # mainloop() returns and main() finishes the shutdown
         except Exception:
             pass  # Ignore any errors during shutdown
     
@@ -1389,77 +2579,86 @@ class WindowManagerGUI:
     
     def create_tray_icon(self):
         """Create the system tray icon."""
-        try:
-            import pystray
-            from PIL import Image
-
-            # Load the custom icon
-            icon_path = os.path.join(os.path.dirname(__file__), "greenhouse_icon.png")
-            if os.path.exists(icon_path):
-                icon_image = Image.open(icon_path)
-            else:
-                # Fallback to default green square if icon file not found
-                icon_image = Image.new('RGB', (64, 64), color='white')
-                draw = ImageDraw.Draw(icon_image)
-                draw.rectangle([8, 8, 56, 56], fill='green')
-
-            menu = (
-                pystray.MenuItem("Show Window", self.show_window),
-                pystray.MenuItem("Settings", self.show_settings),
-                pystray.Menu.SEPARATOR,
-                pystray.MenuItem("Exit", self.on_closing)
-            )
-
-            self.tray_icon = pystray.Icon(
-                "greenhouse",
-                icon_image,
-                "Greenhouse",
-                menu
-            )
-            
-            # Start the icon in a separate thread
-            threading.Thread(target=self.tray_icon.run, daemon=True).start()
-            
-        except ImportError:
+        if pystray is None:
             messagebox.showwarning(
                 "Feature Not Available",
                 "System tray feature requires 'pystray' package. Install with: pip install pystray"
             )
+            return
+        
+        from PIL import Image
+
+        # Load the custom icon
+        icon_path = os.path.join(os.path.dirname(__file__), "greenhouse_icon.png")
+        if os.path.exists(icon_path):
+            icon_image = Image.open(icon_path)
+        else:
+            # Fallback to default green square if icon file not found
+            from PIL import ImageDraw
+            icon_image = Image.new('RGB', (64, 64), color='white')
+            draw = ImageDraw.Draw(icon_image)
+            draw.rectangle([8, 8, 56, 56], fill='green')
+
+        menu = (
+            pystray.MenuItem("Show Window", self._from_tray(self.show_window)),
+            pystray.MenuItem("Settings", self._from_tray(self.show_settings)),
+            pystray.Menu.SEPARATOR,
+            pystray.MenuItem("Exit", self._from_tray(self.on_closing))
+        )
+
+        self.tray_icon = pystray.Icon(
+            "greenhouse",
+            icon_image,
+            "Greenhouse",
+            menu
+        )
+        
+        # Runs pystray's own message loop, which sleeps until the icon gets an event;
+        # stop() in on_closing() ends it
+        self.tray_icon.run_detached()
+    
+    def _from_tray(self, callback):
+        """Wrap a tray menu callback so it runs on Tk's thread, not the tray's."""
+        return lambda icon, item: self.root.after(0, callback)
     
     def minimize_to_tray(self):
         """Minimize the window to system tray."""
+        # Withdrawing also sends a FocusOut; the highlights are already gone by then
+        self._suppress_focus_events = True
         self._on_focus_out(None)  # Remove highlights when minimizing
         self.root.withdraw()  # Hide the window
     
     def show_window(self):
         """Show the window from system tray."""
+        self._suppress_focus_events = False
         self.root.deiconify()  # Show the window
         self.root.lift()  # Bring to front
         self._on_focus_in(None)  # Add highlights when showing
     
     def _on_focus_out(self, event):
         """Handle main window focus loss."""
+        if event is not None and self._suppress_focus_events:
+            return
         if self.is_focused:  # Only act if we were focused before
             self.is_focused = False
             # Remove all window highlights
-            for hwnd in list(self.highlighted_windows):
-                self.window_manager.highlight_window(hwnd, False)
+            self.window_manager.highlight_windows_batch(self.highlighted_windows, False)
             self.highlighted_windows.clear()
     
     def _on_focus_in(self, event):
         """Handle main window focus gain."""
+        if event is not None and self._suppress_focus_events:
+            return
         if not self.is_focused:  # Only act if we weren't focused before
             self.is_focused = True
-            # Add highlights to all selected windows
-            for item in self.window_listbox.items:
-                if item['index'] in self.window_listbox.selected_indices:
-                    hwnd = item['hwnd']
-                    if hwnd not in self.highlighted_windows:  # Only highlight if not already highlighted
-                        self.window_manager.highlight_window(hwnd, True)
-                        self.highlighted_windows.add(hwnd)
+            # Add highlights to the selected windows that aren't highlighted yet
+            desired = self.window_listbox.selected_hwnds()
+            self.window_manager.highlight_windows_batch(desired - self.highlighted_windows, True)
+            self.highlighted_windows |= desired
 
 def main():
     """Application entry point."""
+    app = None
     try:
         # Setup logging first
         log_file = setup_logging()
@@ -1473,13 +2672,15 @@ def main():
         logging.info("Application terminated by user (KeyboardInterrupt)")
     except Exception as e:
         # Print the full error details
-        import traceback
         error_details = traceback.format_exc()
         logging.error(f"Unexpected error occurred:\n{error_details}")
         messagebox.showerror("Error", f"An unexpected error occurred:\n{str(e)}\n\nCheck the logs at:\n{log_file}")
     finally:
         logging.info("Application shutting down")
-        sys.exit(0)
+        # Let the tray thread leave its message loop before the interpreter exits
+        if app is not None and app.tray_icon:
+            app.tray_icon.stop()
+        logging.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -6,8 +6,8 @@ a = Analysis(
     ['app/greenhouse.py'],
     pathex=[],
     binaries=[],
-    datas=[('app/greenhouse_icon.png', '.'), ('app/icon.ico', '.')],
-    hiddenimports=['win32gui', 'win32api', 'win32process', 'win32con', 'win32ui', 'win32gui_struct', 'psutil', 'pystray'],
+    datas=[('app/greenhouse_icon.png', '.')],  # icon.ico is embedded through icon= below
+    hiddenimports=['win32gui', 'win32api', 'win32process', 'win32con', 'win32gui_struct', 'pystray'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],